@@ -0,0 +1,125 @@
+import importlib.util
+import os
+
+import numpy as np
+from ultralytics import YOLO
+
+from box_ops import box_iou
+
+# Inference backends, fastest first on CPU-only machines
+CPU_PREFERENCE = ("openvino", "onnx", "torch")
+
+# Python package each exported format needs at runtime
+RUNTIME_MODULES = {
+    "torch": "torch",
+    "onnx": "onnxruntime",
+    "onnx-int8": "onnxruntime",
+    "openvino": "openvino",
+}
+
+# Values accepted by the --backend flag of every entry point
+BACKEND_CHOICES = ("auto",) + tuple(RUNTIME_MODULES)
+
+
+def exported_path(model_path, backend):
+    """Where ultralytics writes (and where we look for) the exported model for a backend"""
+    stem = os.path.splitext(model_path)[0]
+    if backend == "onnx":
+        return stem + ".onnx"
+    if backend == "onnx-int8":
+        # Produced by quantize_model.py, never picked by 'auto'
+        return stem + "_int8.onnx"
+    if backend == "openvino":
+        return stem + "_openvino_model"
+    return model_path
+
+
+def runtime_available(backend):
+    return importlib.util.find_spec(RUNTIME_MODULES[backend]) is not None
+
+
+def export_model(model_path, backends=("onnx",), imgsz=640):
+    """Export best.pt once to the requested formats. Returns {backend: exported path}."""
+    model = YOLO(model_path)
+    paths = {}
+    for backend in backends:
+        if backend == "torch":
+            continue
+        # dynamic=True keeps the batch dimension open for batched server calls
+        paths[backend] = model.export(format=backend, imgsz=imgsz, dynamic=True)
+        print(f"✅ Exported {backend} model to {paths[backend]}")
+    return paths
+
+
+def is_stale(model_path, backend):
+    """True when the weights were modified after this backend's model was exported from them"""
+    path = exported_path(model_path, backend)
+    return path != model_path and os.path.exists(model_path) and os.path.getmtime(path) < os.path.getmtime(model_path)
+
+
+def export_hint(backend):
+    return "quantize_model.py" if backend == "onnx-int8" else f"export_model.py --formats {backend}"
+
+
+def select_backend(model_path, backend="auto"):
+    """Pick the backend to run. 'auto' chooses the fastest up-to-date exported model whose runtime is installed."""
+    if backend == "auto":
+        for candidate in CPU_PREFERENCE:
+            if not runtime_available(candidate) or not os.path.exists(exported_path(model_path, candidate)):
+                continue
+            if is_stale(model_path, candidate):
+                print(f"⚠️  Skipping {exported_path(model_path, candidate)}: older than {model_path}. "
+                      f"Re-export with: python {export_hint(candidate)}")
+                continue
+            return candidate
+        return "torch"
+    if backend not in RUNTIME_MODULES:
+        raise ValueError(f"Unknown backend '{backend}'. Choose from: auto, {', '.join(RUNTIME_MODULES)}")
+    if not runtime_available(backend):
+        raise RuntimeError(f"Backend '{backend}' needs the '{RUNTIME_MODULES[backend]}' package")
+    if not os.path.exists(exported_path(model_path, backend)):
+        raise FileNotFoundError(f"No {backend} model at {exported_path(model_path, backend)}. "
+                                f"Run: python {export_hint(backend)}")
+    if is_stale(model_path, backend):
+        print(f"⚠️  {exported_path(model_path, backend)} is older than {model_path} and may not match it. "
+              f"Re-export with: python {export_hint(backend)}")
+    return backend
+
+
+def load_model(model_path, backend="auto"):
+    """Load the detector through the chosen backend. Returns (model, backend name)."""
+    backend = select_backend(model_path, backend)
+    path = exported_path(model_path, backend)
+    print(f"Loading {backend} model from {path}")
+    # Exported models carry no task metadata guarantee, so state it explicitly
+    return YOLO(path, task="detect"), backend
+
+
+def match_detections(ref_boxes, ref_conf, boxes, conf, min_iou=0.5):
+    """Greedily match detections against a reference run.
+
+    Returns a dict with the IoU and absolute confidence difference of every
+    matched pair plus the number of unmatched reference/candidate boxes.
+    """
+    ref_conf = np.asarray(ref_conf, dtype=np.float32).reshape(-1)
+    conf = np.asarray(conf, dtype=np.float32).reshape(-1)
+    ious = box_iou(ref_boxes, boxes)
+    matched_iou, conf_diff = [], []
+    used = set()
+    # Highest-confidence reference boxes claim their best partner first
+    for i in np.argsort(-ref_conf):
+        if ious.shape[1] == 0:
+            break
+        candidates = ious[i].copy()
+        candidates[list(used)] = -1.0
+        j = int(np.argmax(candidates))
+        if candidates[j] >= min_iou:
+            used.add(j)
+            matched_iou.append(float(candidates[j]))
+            conf_diff.append(float(abs(ref_conf[i] - conf[j])))
+    return {
+        "iou": matched_iou,
+        "conf_diff": conf_diff,
+        "missed": len(ref_conf) - len(matched_iou),
+        "extra": len(conf) - len(matched_iou),
+    }
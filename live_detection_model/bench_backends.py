@@ -0,0 +1,115 @@
+import argparse
+import glob
+import multiprocessing as mp
+import os
+import resource
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from backends import RUNTIME_MODULES, exported_path, load_model, match_detections, runtime_available
+
+# Usage: python bench_backends.py --images test_images --backends torch onnx openvino
+
+
+def load_images(image_dir):
+    """Read every image as the grayscale 3-channel frame the detection scripts feed the model"""
+    paths = sorted(p for ext in ("jpg", "jpeg", "png") for p in glob.glob(os.path.join(image_dir, f"*.{ext}")))
+    frames = []
+    for path in paths:
+        image = cv2.imread(path)
+        if image is not None:
+            frames.append(cv2.cvtColor(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY), cv2.COLOR_GRAY2BGR))
+    return frames
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_backend(model_path, backend, image_dir, iterations, conf, queue):
+    """Runs in a fresh process so each backend's memory is measured in isolation"""
+    frames = load_images(image_dir)
+    model, backend = load_model(model_path, backend)
+    # Warm up so lazy initialization is not counted
+    model(frames[0], conf=conf, verbose=False)
+
+    detections = []
+    for frame in frames:
+        boxes = model(frame, conf=conf, verbose=False)[0].boxes
+        detections.append((boxes.xyxy.cpu().numpy(), boxes.conf.cpu().numpy()))
+
+    latencies = []
+    for i in range(iterations):
+        frame = frames[i % len(frames)]
+        start = time.perf_counter()
+        model(frame, conf=conf, verbose=False)
+        latencies.append(time.perf_counter() - start)
+
+    queue.put({
+        "latency_ms": np.asarray(latencies) * 1000,
+        "peak_rss_mb": peak_rss_mb(),
+        "detections": detections,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare latency, memory and output parity across backends")
+    parser.add_argument("--model", default="models/best.pt")
+    parser.add_argument("--images", default="test_images")
+    parser.add_argument("--backends", nargs="+", default=list(RUNTIME_MODULES))
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--conf", type=float, default=0.25)
+    parser.add_argument("--iou-tol", type=float, default=0.95, help="Minimum IoU of matched boxes vs torch")
+    parser.add_argument("--conf-tol", type=float, default=0.02, help="Maximum confidence difference vs torch")
+    args = parser.parse_args()
+
+    if not load_images(args.images):
+        print(f"❌ No images found in {args.images}")
+        return
+
+    ctx = mp.get_context("spawn")
+    reports = {}
+    for backend in args.backends:
+        if not runtime_available(backend) or not os.path.exists(exported_path(args.model, backend)):
+            print(f"⚠️  Skipping {backend}: runtime not installed or model not exported")
+            continue
+        queue = ctx.Queue()
+        worker = ctx.Process(target=run_backend,
+                             args=(args.model, backend, args.images, args.iterations, args.conf, queue))
+        worker.start()
+        reports[backend] = queue.get()
+        worker.join()
+
+    print(f"\n{'backend':<10} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'peak RSS MB':>12} {'parity':>8}")
+    reference = reports.get("torch")
+    all_match = True
+    for backend, report in reports.items():
+        latency = report["latency_ms"]
+        parity = "ref"
+        if reference is not None and backend != "torch":
+            ious, conf_diffs, unmatched = [], [], 0
+            for (ref_boxes, ref_conf), (boxes, conf) in zip(reference["detections"], report["detections"]):
+                match = match_detections(ref_boxes, ref_conf, boxes, conf)
+                ious += match["iou"]
+                conf_diffs += match["conf_diff"]
+                unmatched += match["missed"] + match["extra"]
+            ok = (unmatched == 0 and min(ious, default=1.0) >= args.iou_tol
+                  and max(conf_diffs, default=0.0) <= args.conf_tol)
+            all_match = all_match and ok
+            parity = "✅" if ok else "❌"
+        print(f"{backend:<10} {latency.mean():>8.2f} {np.percentile(latency, 50):>8.2f} "
+              f"{np.percentile(latency, 95):>8.2f} {report['peak_rss_mb']:>12.1f} {parity:>8}")
+
+    if reference is None:
+        print("\n⚠️  torch was not benchmarked, so outputs were not checked for parity")
+    elif not all_match:
+        print(f"\n❌ Some backends differ from torch beyond IoU >= {args.iou_tol} / conf diff <= {args.conf_tol}")
+
+
+if __name__ == "__main__":
+    main()
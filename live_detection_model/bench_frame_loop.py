@@ -0,0 +1,111 @@
+import argparse
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from frame_buffers import FrameRing
+from render import draw_detections, draw_status_overlay
+
+# Usage: python bench_frame_loop.py [--video recording.mp4] [--frames 300]
+#
+# Measures the per-frame cost of the webcam loop around the model call (capture,
+# grayscale conversion, model input, display copy, drawing) with fresh arrays
+# every frame versus the preallocated FrameRing. The model itself is left out.
+# Memory churn is the peak of new allocations per frame seen by tracemalloc;
+# it is measured in a separate run because tracing slows the loop down.
+
+
+class SyntheticCapture:
+    """Stands in for cv2.VideoCapture, including reads into a caller-supplied buffer"""
+
+    def __init__(self, width, height, count=8):
+        rng = np.random.default_rng(0)
+        self.frames = [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(count)]
+        self.index = 0
+
+    def read(self, image=None):
+        frame = self.frames[self.index % len(self.frames)]
+        self.index += 1
+        if image is None or image.shape != frame.shape:
+            return True, frame.copy()
+        np.copyto(image, frame)
+        return True, image
+
+
+def open_capture(args):
+    if args.video is None:
+        return SyntheticCapture(args.width, args.height)
+    cap = cv2.VideoCapture(args.video)
+    if not cap.isOpened():
+        raise SystemExit(f"❌ Error: Could not open video {args.video}")
+    return cap
+
+
+def allocating_step(cap, state, boxes, confs):
+    """The loop before FrameRing: every step returns a new array"""
+    ret, frame = cap.read()
+    display_frame = frame.copy()
+    gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    state["model_input"] = cv2.cvtColor(gray_frame, cv2.COLOR_GRAY2BGR)
+    draw_detections(display_frame, boxes, confs, 0.23, True)
+    draw_status_overlay(display_frame, 30, 0.23, True)
+
+
+def ring_step(cap, state, boxes, confs):
+    slot = state["ring"].next()
+    slot.read(cap)
+    if state.get("model_input") is None:
+        state["model_input"] = np.empty_like(slot.frame)
+    cv2.cvtColor(slot.gray, cv2.COLOR_GRAY2BGR, dst=state["model_input"])
+    draw_detections(slot.display, boxes, confs, 0.23, True, gray_frame=slot.gray)
+    draw_status_overlay(slot.display, 30, 0.23, True)
+
+
+def run(step, args, boxes, confs, trace):
+    cap = open_capture(args)
+    state = {"ring": FrameRing(size=2)}
+    step(cap, state, boxes, confs)  # allocate buffers before measuring
+    timings, churn = [], []
+    if trace:
+        tracemalloc.start()
+    for _ in range(args.frames):
+        if trace:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        step(cap, state, boxes, confs)
+        timings.append((time.perf_counter() - start) * 1000)
+        if trace:
+            churn.append((tracemalloc.get_traced_memory()[1] - before) / 1024)
+    if trace:
+        tracemalloc.stop()
+        return float(np.mean(churn))
+    return float(np.median(timings)), float(np.percentile(timings, 95))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-frame allocations in the webcam loop")
+    parser.add_argument("--video", default=None, help="Read frames from a video instead of synthetic frames")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--boxes", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    x1 = rng.uniform(0, args.width - 150, args.boxes)
+    y1 = rng.uniform(40, args.height - 150, args.boxes)
+    boxes = np.stack([x1, y1, x1 + 120, y1 + 140], axis=1).astype(np.float32)
+    confs = rng.uniform(0.3, 1.0, args.boxes).astype(np.float32)
+
+    print(f"{'loop':<12} {'p50 ms':>8} {'p95 ms':>8} {'churn KB/frame':>15}")
+    for name, step in (("allocating", allocating_step), ("frame ring", ring_step)):
+        p50, p95 = run(step, args, boxes, confs, trace=False)
+        churn = run(step, args, boxes, confs, trace=True)
+        print(f"{name:<12} {p50:>8.3f} {p95:>8.3f} {churn:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
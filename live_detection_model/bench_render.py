@@ -0,0 +1,94 @@
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from render import accent_color, class_name, draw_detections, draw_status_overlay, primary_color, secondary_color
+
+# Usage: python bench_render.py [--counts 0 1 5 10 20 50] [--iterations 200]
+#
+# Times the per-frame overlay drawing against the number of detections: the
+# previous per-box code (a full-frame copy and blend for every label) versus
+# render.py. Also reports the mean pixel difference between the two outputs; it
+# is zero for separate boxes and grows with overlaps, because the old loop grayed
+# out each box after the previous boxes' outlines and labels were drawn.
+
+
+def legacy_draw(display_frame, boxes, confs, fps, confidence):
+    """The per-box drawing loop the detection scripts used before render.py"""
+    for (x1, y1, x2, y2), conf in zip(boxes.astype(int), confs):
+        conf = float(conf)
+        detected_region = display_frame[y1:y2, x1:x2]
+        if detected_region.size > 0:
+            gray_region = cv2.cvtColor(detected_region, cv2.COLOR_BGR2GRAY)
+            display_frame[y1:y2, x1:x2] = cv2.cvtColor(gray_region, cv2.COLOR_GRAY2BGR)
+        cv2.rectangle(display_frame, (x1, y1), (x2, y2), primary_color, 3)
+        for (ax, ay), (bx, by) in (((x1, y1), (x1 + 15, y1)), ((x1, y1), (x1, y1 + 15)),
+                                   ((x2 - 15, y1), (x2, y1)), ((x2, y1), (x2, y1 + 15)),
+                                   ((x1, y2 - 15), (x1, y2)), ((x1, y2), (x1 + 15, y2)),
+                                   ((x2 - 15, y2), (x2, y2)), ((x2, y2), (x2, y2 - 15))):
+            cv2.line(display_frame, (ax, ay), (bx, by), primary_color, 3)
+        label = f'{class_name.upper()} {conf:.2f}'
+        label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2)[0]
+        bg = (x1, y1 - label_size[1] - 16), (x1 + label_size[0] + 16, y1)
+        overlay = display_frame.copy()
+        cv2.rectangle(overlay, bg[0], bg[1], primary_color, -1)
+        cv2.addWeighted(overlay, 0.8, display_frame, 0.2, 0, display_frame)
+        cv2.rectangle(display_frame, bg[0], bg[1], primary_color, 2)
+        cv2.putText(display_frame, label, (x1 + 9, y1 - 7), cv2.FONT_HERSHEY_SIMPLEX, 0.7, accent_color, 2)
+        cv2.putText(display_frame, label, (x1 + 8, y1 - 8), cv2.FONT_HERSHEY_SIMPLEX, 0.7, secondary_color, 2)
+
+    overlay = display_frame.copy()
+    cv2.rectangle(overlay, (5, 5), (200, 100), (0, 0, 0), -1)
+    cv2.addWeighted(overlay, 0.3, display_frame, 0.7, 0, display_frame)
+    cv2.putText(display_frame, f'FPS: {fps:.0f}', (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, secondary_color, 2)
+    cv2.putText(display_frame, f'Conf: {confidence:.2f}', (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, secondary_color, 2)
+    cv2.putText(display_frame, 'Gray: ON', (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+
+
+def shared_draw(display_frame, boxes, confs, fps, confidence):
+    draw_detections(display_frame, boxes, confs, confidence, True)
+    draw_status_overlay(display_frame, fps, confidence, True)
+
+
+def random_detections(count, width, height, rng):
+    x1 = rng.uniform(0, width - 120, count)
+    y1 = rng.uniform(40, height - 120, count)
+    sizes = rng.uniform(40, 120, (count, 2))
+    boxes = np.stack([x1, y1, x1 + sizes[:, 0], y1 + sizes[:, 1]], axis=1).astype(np.float32)
+    return boxes, rng.uniform(0.3, 1.0, count).astype(np.float32)
+
+
+def time_draw(draw_fn, frame, boxes, confs, iterations):
+    timings = []
+    for _ in range(iterations):
+        display_frame = frame.copy()
+        start = time.perf_counter()
+        draw_fn(display_frame, boxes, confs, 30.0, 0.23)
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings)), display_frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark detection overlay rendering")
+    parser.add_argument("--counts", type=int, nargs="+", default=[0, 1, 5, 10, 20, 50])
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, (args.height, args.width, 3), dtype=np.uint8)
+
+    print(f"{'boxes':>6} {'legacy ms':>10} {'shared ms':>10} {'speedup':>8} {'pixel diff':>11}")
+    for count in args.counts:
+        boxes, confs = random_detections(count, args.width, args.height, rng)
+        legacy_ms, legacy_frame = time_draw(legacy_draw, frame, boxes, confs, args.iterations)
+        shared_ms, shared_frame = time_draw(shared_draw, frame, boxes, confs, args.iterations)
+        diff = np.abs(legacy_frame.astype(np.int16) - shared_frame.astype(np.int16)).mean()
+        print(f"{count:>6} {legacy_ms:>10.3f} {shared_ms:>10.3f} {legacy_ms / shared_ms:>7.1f}x {diff:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import argparse
+import time
+
+import cv2
+
+from backends import BACKEND_CHOICES, load_model, match_detections
+from tracker import KeyframeDetector, KeyframeScheduler, Tracker
+from webcam_detection import run_model
+
+# Usage: python evaluate_tracking.py recording.mp4 --keyframe-interval 5 [--motion-threshold 8]
+#
+# Runs the detector on every frame of a recorded video as the reference, then
+# replays the video in tracking mode and reports how much detector CPU time was
+# saved and how closely the tracked boxes follow the per-frame detections.
+
+
+def read_frames(video_path, max_frames):
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise SystemExit(f"❌ Error: Could not open video {video_path}")
+    count = 0
+    while max_frames is None or count < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        count += 1
+        yield frame
+    cap.release()
+
+
+def run_pass(video_path, detect, max_frames):
+    """Run detect(frame) over the video. Returns per-frame outputs and the CPU seconds spent in detect."""
+    outputs, cpu = [], 0.0
+    for frame in read_frames(video_path, max_frames):
+        start = time.process_time()
+        outputs.append(detect(frame))
+        cpu += time.process_time() - start
+    return outputs, cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare keyframe tracking against per-frame detection")
+    parser.add_argument("video")
+    parser.add_argument("--model", default="models/best.pt")
+    parser.add_argument("--backend", default="auto", choices=BACKEND_CHOICES)
+    parser.add_argument("--conf", type=float, default=0.23, help="Display threshold both runs are scored at")
+    parser.add_argument("--keyframe-interval", type=int, default=5)
+    parser.add_argument("--motion-threshold", type=float, default=None)
+    parser.add_argument("--iou", type=float, default=0.5, help="IoU for a tracked box to count as a hit")
+    parser.add_argument("--max-frames", type=int, default=None)
+    args = parser.parse_args()
+
+    model, backend = load_model(args.model, args.backend)
+    calls = {"reference": 0, "tracking": 0}
+
+    def counted(name):
+        def detect_gray(gray_frame):
+            calls[name] += 1
+            return run_model(model, gray_frame, args.conf)
+        return detect_gray
+
+    # Warm up so lazy initialization is not charged to the first pass
+    for frame in read_frames(args.video, 1):
+        run_model(model, cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), args.conf)
+
+    reference_detect = counted("reference")
+    reference, reference_cpu = run_pass(
+        args.video, lambda frame: reference_detect(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)), args.max_frames)
+
+    scheduler = KeyframeScheduler(args.keyframe_interval, args.motion_threshold)
+    detector = KeyframeDetector(counted("tracking"), Tracker(new_track_score=args.conf), scheduler)
+    tracked, tracking_cpu = run_pass(args.video, detector, args.max_frames)
+
+    hits = ref_total = track_total = 0
+    for (ref_boxes, ref_conf), (boxes, scores, _) in zip(reference, tracked):
+        keep_ref, keep = ref_conf >= args.conf, scores >= args.conf
+        match = match_detections(ref_boxes[keep_ref], ref_conf[keep_ref], boxes[keep], scores[keep], args.iou)
+        hits += len(match["iou"])
+        ref_total += int(keep_ref.sum())
+        track_total += int(keep.sum())
+
+    frames = len(reference)
+    print(f"🎯 {frames} frames, backend {backend}, keyframe interval {args.keyframe_interval}")
+    print(f"{'mode':<10} {'model calls':>12} {'CPU s':>8} {'CPU ms/frame':>13}")
+    for name, cpu in (("reference", reference_cpu), ("tracking", tracking_cpu)):
+        print(f"{name:<10} {calls[name]:>12} {cpu:>8.2f} {cpu / max(frames, 1) * 1000:>13.2f}")
+    print(f"CPU reduction: {reference_cpu / max(tracking_cpu, 1e-9):.1f}x")
+    print(f"Recall vs per-frame detection: {hits / max(ref_total, 1):.3f}")
+    print(f"Precision vs per-frame detection: {hits / max(track_total, 1):.3f}")
+    print(f"Unique objects tracked: {detector.tracker.unique_count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+import argparse
+import os
+
+from backends import export_model
+
+# Usage: python export_model.py --formats onnx openvino
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export models/best.pt for CPU inference runtimes")
+    parser.add_argument("--model", default="models/best.pt")
+    parser.add_argument("--formats", nargs="+", default=["onnx"], choices=["onnx", "openvino"])
+    parser.add_argument("--imgsz", type=int, default=640)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.model):
+        print(f"❌ Model not found: {args.model}")
+        return
+
+    export_model(args.model, args.formats, imgsz=args.imgsz)
+    print("Export complete. Detection scripts pick the fastest available backend with --backend auto")
+
+
+if __name__ == "__main__":
+    main()
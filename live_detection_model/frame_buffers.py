@@ -0,0 +1,43 @@
+import cv2
+import numpy as np
+
+
+class FrameSlot:
+    """Capture, grayscale and display buffers for one frame, reused across reads"""
+
+    def __init__(self):
+        self.frame = None
+        self.gray = None
+        self.display = None
+
+    def read(self, cap):
+        """Read the next frame into this slot. Returns False when the capture failed."""
+        ret, frame = cap.read(self.frame)
+        if not ret:
+            return False
+        if self.display is None or self.display.shape != frame.shape:
+            # First read, or the camera changed resolution: size the buffers once
+            self.gray = np.empty(frame.shape[:2], dtype=np.uint8)
+            self.display = np.empty_like(frame)
+        # A VideoSource hands back a frame from its own pool rather than filling ours
+        self.frame = frame
+        cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY, dst=self.gray)
+        np.copyto(self.display, self.frame)
+        return True
+
+
+class FrameRing:
+    """Round-robin set of preallocated FrameSlots.
+
+    The slot handed out by next() stays untouched until `size` more frames
+    have been read, so the previous frame can still be shown or saved while
+    the next one is captured.
+    """
+
+    def __init__(self, size=2):
+        self.slots = [FrameSlot() for _ in range(size)]
+        self._index = -1
+
+    def next(self):
+        self._index = (self._index + 1) % len(self.slots)
+        return self.slots[self._index]
@@ -0,0 +1,63 @@
+import cv2
+
+
+class MotionGate:
+    """Skips inference on frames where the scene has not changed.
+
+    Frames are shrunk to `size` before comparing, so the check costs a small
+    fraction of a model call. A frame passes the gate when its mean absolute
+    difference (0-255) from the last inferred frame exceeds `threshold`, or
+    when `max_skip` frames in a row have been skipped. With threshold=None
+    only the skip limit applies.
+    """
+
+    def __init__(self, threshold=4.0, max_skip=30, size=(64, 48)):
+        self.threshold = threshold
+        self.max_skip = max_skip
+        self.size = size
+        self._reference = None
+        self._skipped_in_row = 0
+        self.inferred = 0
+        self.skipped = 0
+
+    def _thumbnail(self, frame):
+        # Shrink before the color conversion; INTER_AREA also averages out sensor noise
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+
+    def should_infer(self, frame):
+        """Takes a BGR or grayscale frame. Returns True when the detector should run on it."""
+        due = self._reference is None or self._skipped_in_row >= self.max_skip
+        small = None
+        if not due and self.threshold is not None:
+            small = self._thumbnail(frame)
+            due = cv2.absdiff(small, self._reference).mean() > self.threshold
+        if not due:
+            self._skipped_in_row += 1
+            self.skipped += 1
+            return False
+        # Compare later frames against this one, so slow drift still adds up to a trigger
+        self._reference = small if small is not None else self._thumbnail(frame)
+        self._skipped_in_row = 0
+        self.inferred += 1
+        return True
+
+    def skip_ratio(self):
+        return self.skipped / max(self.inferred + self.skipped, 1)
+
+    def format(self):
+        return f"inferred: {self.inferred} | skipped: {self.skipped} ({self.skip_ratio():.0%})"
+
+
+class GatedDetector:
+    """Wraps a (frame, gray) -> detections callable and reuses the last detections on static frames"""
+
+    def __init__(self, detect_fn, gate):
+        self.detect_fn = detect_fn
+        self.gate = gate
+        self._last = None
+
+    def __call__(self, frame, gray=None):
+        if self.gate.should_infer(frame if gray is None else gray) or self._last is None:
+            self._last = self.detect_fn(frame, gray)
+        return self._last
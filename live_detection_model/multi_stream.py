@@ -0,0 +1,228 @@
+import argparse
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+
+import cv2
+
+from backends import BACKEND_CHOICES, load_model
+from pipeline import StageStats
+from process_video import frame_record
+from render import results_to_arrays
+from video_source import SOURCE_MODES, VideoSource
+
+# Usage: python multi_stream.py 0 1 rtsp://cam3.local/stream recording.mp4 [--max-batch 4] [--workers 1]
+#
+# Serves several cameras from one model instance (or a small pool with --workers).
+# Frames from all streams are gathered into cross-stream batches; each batch holds
+# at most one frame per stream and the next batch starts after the last stream
+# served, so a busy camera cannot starve the others. Per-stream FPS and latency
+# (decode to detections) are printed periodically.
+
+
+class Stream:
+    """One camera: its source, per-stream statistics and optional detections file"""
+
+    def __init__(self, name, source, output=None):
+        self.name = name
+        self.source = source
+        self.output = output
+        self.stats = StageStats()
+        self.frames = 0
+        self.finished = False
+        self._lock = threading.Lock()
+        self._fps_count = 0
+        self._fps_start = time.perf_counter()
+        self.fps = 0.0
+
+    def record(self, latency, index, timestamp_ms, boxes, confs):
+        """Route one frame's detections back to this stream"""
+        with self._lock:
+            self.stats.record("latency", latency)
+            self.frames += 1
+            self._fps_count += 1
+            now = time.perf_counter()
+            if now - self._fps_start >= 1.0:
+                self.fps = self._fps_count / (now - self._fps_start)
+                self._fps_count = 0
+                self._fps_start = now
+            if self.output is not None:
+                self.output.write(json.dumps(frame_record(index, timestamp_ms, boxes, confs),
+                                             separators=(",", ":")) + "\n")
+
+
+class MultiStreamRunner:
+    """Round-robin batcher feeding a pool of inference workers that share the streams"""
+
+    def __init__(self, streams, model_factory, conf=0.23, max_batch=None, workers=1):
+        self.streams = streams
+        self.model_factory = model_factory
+        self.conf = conf
+        self.max_batch = max_batch or len(streams)
+        self.batches = queue.Queue()
+        # Frames are only gathered once a worker is free, so a batch never waits behind another one
+        self._idle = threading.Semaphore(workers)
+        self.workers = [threading.Thread(target=self._infer_loop, name=f"infer-{i}", daemon=True)
+                        for i in range(workers)]
+        self._next = 0
+        self.batches_sent = 0
+        self.frames_sent = 0
+        self.stats = StageStats()
+        # First exception raised by a worker; run() re-raises it instead of waiting on a dead pool
+        self.error = None
+
+    def gather(self):
+        """Take at most one fresh frame per stream, starting after the last stream served"""
+        batch = []
+        count = len(self.streams)
+        start = self._next
+        for offset in range(count):
+            if len(batch) >= self.max_batch:
+                break
+            position = (start + offset) % count
+            stream = self.streams[position]
+            if stream.finished:
+                continue
+            ret, frame = stream.source.poll()
+            if not ret:
+                stream.finished = True
+            elif frame is not None:
+                source = stream.source
+                batch.append((stream, source.frame_index, source.timestamp_ms, source.captured_at, frame))
+                self._next = position + 1
+        return batch
+
+    def _infer_loop(self):
+        try:
+            model = self.model_factory()
+            while True:
+                batch = self.batches.get()
+                if batch is None:
+                    break
+                try:
+                    self._infer(model, batch)
+                finally:
+                    self._idle.release()
+        except Exception as exc:
+            print(f"❌ {threading.current_thread().name} failed: {exc!r}")
+            if self.error is None:
+                self.error = exc
+
+    def _infer(self, model, batch):
+        start = time.perf_counter()
+        # Same grayscale 3-channel input as the single-camera script
+        frames = [cv2.cvtColor(cv2.cvtColor(item[4], cv2.COLOR_BGR2GRAY), cv2.COLOR_GRAY2BGR) for item in batch]
+        results = model(frames, conf=self.conf, verbose=False)
+        done = time.perf_counter()
+        self.stats.record("inference", done - start)
+        for (stream, index, timestamp_ms, captured_at, _), result in zip(batch, results):
+            boxes, confs = results_to_arrays([result])
+            stream.record(done - captured_at, index, timestamp_ms, boxes, confs)
+
+    def run(self, report_interval=5.0, duration=None):
+        for worker in self.workers:
+            worker.start()
+        started = last_report = time.perf_counter()
+        try:
+            while not all(stream.finished for stream in self.streams):
+                if self.error is not None:
+                    raise self.error
+                if duration is not None and time.perf_counter() - started >= duration:
+                    break
+                # While every worker is busy the streams keep only their newest frame
+                if not self._idle.acquire(timeout=0.1):
+                    continue
+                batch = self.gather()
+                if not batch:
+                    self._idle.release()
+                    time.sleep(0.002)
+                    continue
+                self.batches_sent += 1
+                self.frames_sent += len(batch)
+                self.batches.put(batch)
+                if time.perf_counter() - last_report >= report_interval:
+                    last_report = time.perf_counter()
+                    self.report(time.perf_counter() - started)
+        finally:
+            for _ in self.workers:
+                self.batches.put(None)
+            for worker in self.workers:
+                worker.join(timeout=10.0)
+        if self.error is not None:
+            raise self.error
+        self.report(time.perf_counter() - started, final=True)
+
+    def report(self, elapsed, final=False):
+        title = "📊 Final" if final else "📊"
+        total = sum(stream.frames for stream in self.streams)
+        batch = self.frames_sent / max(self.batches_sent, 1)
+        inference = self.stats.summary().get("inference", {})
+        print(f"{title} {len(self.streams)} streams | {total / max(elapsed, 1e-9):.1f} FPS total | "
+              f"mean batch {batch:.1f} | inference {inference.get('mean', 0.0):.1f}ms/batch")
+        print(f"   {'stream':<24} {'frames':>7} {'FPS':>6} {'avg FPS':>8} {'p50 ms':>7} {'p95 ms':>7} {'dropped':>8}")
+        for stream in self.streams:
+            latency = stream.stats.summary().get("latency", {})
+            print(f"   {stream.name[:24]:<24} {stream.frames:>7} {stream.fps:>6.1f} "
+                  f"{stream.frames / max(elapsed, 1e-9):>8.1f} {latency.get('p50', 0.0):>7.1f} "
+                  f"{latency.get('p95', 0.0):>7.1f} {stream.source.dropped:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run clothing detection on several cameras with one model")
+    parser.add_argument("sources", nargs="+", help="Camera ids, video files, or RTSP/HTTP URLs")
+    parser.add_argument("--model", default="models/best.pt")
+    parser.add_argument("--backend", default="auto", choices=BACKEND_CHOICES)
+    parser.add_argument("--conf", type=float, default=0.23)
+    parser.add_argument("--max-batch", type=int, default=None, help="Frames per model call (default: one per stream)")
+    parser.add_argument("--workers", type=int, default=1, help="Inference workers, each with its own model copy")
+    parser.add_argument("--source-mode", default="realtime", choices=SOURCE_MODES)
+    parser.add_argument("--pace", action="store_true", help="Play video files at their own frame rate")
+    parser.add_argument("--output-dir", default=None, help="Write per-stream detections (.jsonl.gz) here")
+    parser.add_argument("--report-interval", type=float, default=5.0)
+    parser.add_argument("--duration", type=float, default=None, help="Stop after this many seconds")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.model):
+        print(f"❌ Model not found: {args.model}")
+        return
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    streams = []
+    for i, source in enumerate(args.sources):
+        # A stream has at most one frame in each batch being inferred
+        video = VideoSource(source, mode=args.source_mode, buffer_size=1, width=640, height=480,
+                            fps=30, pace=args.pace, hold=args.workers)
+        if not video.isOpened():
+            print(f"❌ Error: Could not open source {source}")
+            continue
+        output = None
+        if args.output_dir:
+            output = gzip.open(os.path.join(args.output_dir, f"stream{i}_detections.jsonl.gz"), "wt")
+        streams.append(Stream(f"{i}: {source}", video.start(), output))
+    if not streams:
+        return
+
+    def model_factory():
+        model, backend = load_model(args.model, args.backend)
+        print(f"Model loaded! (backend: {backend})")
+        return model
+
+    print(f"🎥 Serving {len(streams)} streams with {args.workers} model instance(s)")
+    runner = MultiStreamRunner(streams, model_factory, args.conf, args.max_batch, args.workers)
+    try:
+        runner.run(args.report_interval, args.duration)
+    except KeyboardInterrupt:
+        print("\n🛑 Interrupted by user")
+    finally:
+        for stream in streams:
+            stream.source.release()
+            if stream.output is not None:
+                stream.output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+import queue
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+class LatestQueue:
+    """Bounded queue that drops the oldest item instead of blocking the producer.
+
+    on_drop, if given, is called with every item thrown away, so the producer can
+    reuse its buffer.
+    """
+
+    def __init__(self, maxsize=1, on_drop=None):
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self.on_drop = on_drop
+        self.dropped = 0
+
+    def put(self, item):
+        with self._lock:
+            while True:
+                try:
+                    self._queue.put_nowait(item)
+                    return
+                except queue.Full:
+                    # Throw away the stale frame so consumers always see the newest one
+                    try:
+                        stale = self._queue.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        continue
+                    if self.on_drop is not None:
+                        self.on_drop(stale)
+
+    def get(self, timeout=None):
+        return self._queue.get(timeout=timeout)
+
+
+class StageStats:
+    """Rolling latency statistics for each pipeline stage (in milliseconds)"""
+
+    def __init__(self, window=120):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        with self._lock:
+            samples = self._samples.setdefault(stage, deque(maxlen=self.window))
+            samples.append(seconds * 1000.0)
+
+    def summary(self):
+        with self._lock:
+            snapshot = {stage: list(samples) for stage, samples in self._samples.items()}
+        stats = {}
+        for stage, samples in snapshot.items():
+            if samples:
+                values = np.asarray(samples)
+                stats[stage] = {
+                    "mean": float(values.mean()),
+                    "p50": float(np.percentile(values, 50)),
+                    "p95": float(np.percentile(values, 95)),
+                }
+        return stats
+
+    def format(self):
+        parts = [f"{stage}: {s['mean']:.1f}ms (p95 {s['p95']:.1f})" for stage, s in self.summary().items()]
+        return " | ".join(parts)
+
+
+class DetectionPipeline:
+    """Capture -> inference -> render pipeline linked by bounded queues.
+
+    Capture and inference each run on a worker thread. Rendering happens on the
+    thread that iterates the pipeline, because cv2.imshow/waitKey must stay on the
+    main thread on macOS.
+
+    With drop_frames=True the queues keep only the newest frames, like a live
+    camera; with False they block so every frame is inferred and rendered. By
+    default frames are dropped unless the capture is a VideoSource in
+    "exhaustive" mode.
+    """
+
+    def __init__(self, cap, infer_fn, queue_size=1, drop_frames=None):
+        self.cap = cap
+        self.infer_fn = infer_fn
+        if drop_frames is None:
+            drop_frames = getattr(cap, "mode", "realtime") != "exhaustive"
+        self.drop_frames = drop_frames
+        make_queue = LatestQueue if drop_frames else queue.Queue
+        self.capture_queue = make_queue(queue_size)
+        self.result_queue = make_queue(queue_size)
+        self.stats = StageStats()
+        self._stop = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name="capture", daemon=True),
+            threading.Thread(target=self._inference_loop, name="inference", daemon=True),
+        ]
+        self.frames_rendered = 0
+        self._fps_count = 0
+        self._fps_start = time.perf_counter()
+        self.fps = 0.0
+
+    def start(self):
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=2.0)
+
+    def _put(self, target, item):
+        """Hand an item to the next stage. Returns False if the pipeline stopped while blocked."""
+        if self.drop_frames:
+            target.put(item)
+            return True
+        while not self._stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _capture_loop(self):
+        frame_id = 0
+        while not self._stop.is_set():
+            start = time.perf_counter()
+            ret, frame = self.cap.read()
+            if not ret:
+                print("Error: Could not read frame")
+                # Wake the consumer so it can shut down
+                self._put(self.capture_queue, None)
+                break
+            # Time spent waiting for the source; a VideoSource decodes on its own thread, so this
+            # is mostly waiting for the next frame rather than decoding it
+            self.stats.record("read_wait", time.perf_counter() - start)
+            # A VideoSource knows when the frame was decoded; a plain capture decodes inside read()
+            captured_at = getattr(self.cap, "captured_at", start)
+            if not self._put(self.capture_queue, (frame_id, captured_at, frame)):
+                break
+            frame_id += 1
+
+    def _inference_loop(self):
+        while not self._stop.is_set():
+            try:
+                item = self.capture_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is None:
+                self._put(self.result_queue, None)
+                break
+            frame_id, captured_at, frame = item
+            start = time.perf_counter()
+            results = self.infer_fn(frame)
+            self.stats.record("inference", time.perf_counter() - start)
+            if not self._put(self.result_queue, (frame_id, captured_at, frame, results)):
+                break
+
+    def results(self):
+        """Yield (frame, results) pairs for rendering until the capture ends or stop() is called"""
+        while not self._stop.is_set():
+            try:
+                item = self.result_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is None:
+                break
+            frame_id, captured_at, frame, results = item
+            yield frame, results
+            now = time.perf_counter()
+            # Everything between decoding and the end of rendering for this frame
+            self.stats.record("end_to_end", now - captured_at)
+            self.frames_rendered += 1
+            self._fps_count += 1
+            if now - self._fps_start >= 1.0:
+                self.fps = self._fps_count / (now - self._fps_start)
+                self._fps_count = 0
+                self._fps_start = now
+
+    def dropped_frames(self):
+        return getattr(self.capture_queue, "dropped", 0) + getattr(self.result_queue, "dropped", 0)
@@ -0,0 +1,107 @@
+import argparse
+import gzip
+import json
+import os
+import time
+
+import cv2
+
+from backends import BACKEND_CHOICES, load_model
+from render import results_to_arrays
+from video_source import SOURCE_MODES, VideoSource
+
+# Usage: python process_video.py shift_recording.mp4 [--output output/shift.jsonl.gz] [--batch-size 8]
+#        python process_video.py rtsp://camera.local/stream --mode realtime
+#
+# Writes one JSON line per processed frame: {"f": frame index, "t": timestamp ms,
+# "d": [[x1, y1, x2, y2, confidence], ...]}. A .gz output is gzip-compressed.
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run clothing detection over a video file or stream")
+    parser.add_argument("source", help="Camera id, video file, or RTSP/HTTP URL")
+    parser.add_argument("--output", default=None, help="Detections file (.jsonl or .jsonl.gz)")
+    parser.add_argument("--model", default="models/best.pt")
+    parser.add_argument("--backend", default="auto", choices=BACKEND_CHOICES)
+    parser.add_argument("--conf", type=float, default=0.23)
+    parser.add_argument("--mode", default="auto", choices=SOURCE_MODES,
+                        help="realtime drops frames when behind; exhaustive processes every frame")
+    parser.add_argument("--batch-size", type=int, default=8, help="Frames per model call")
+    parser.add_argument("--buffer-size", type=int, default=32, help="Decoded frames buffered ahead of inference")
+    parser.add_argument("--max-frames", type=int, default=None)
+    parser.add_argument("--pace", action="store_true",
+                        help="Decode a file at its own frame rate, as a stand-in for a live stream")
+    parser.add_argument("--hw-decode", action="store_true", help="Ask OpenCV for hardware-accelerated decoding")
+    return parser.parse_args()
+
+
+def default_output(source):
+    name = os.path.splitext(os.path.basename(str(source).rstrip("/")))[0] or "stream"
+    return os.path.join("output", f"{name}_detections.jsonl.gz")
+
+
+def frame_record(index, timestamp_ms, boxes, confs):
+    return {
+        "f": index,
+        "t": round(timestamp_ms, 1),
+        "d": [[*(round(float(v), 1) for v in box), round(float(c), 3)] for box, c in zip(boxes, confs)],
+    }
+
+
+def main():
+    args = parse_args()
+    if not os.path.exists(args.model):
+        print(f"❌ Model not found: {args.model}")
+        return
+
+    source = VideoSource(args.source, mode=args.mode, buffer_size=args.buffer_size,
+                         pace=args.pace, hw_decode=args.hw_decode)
+    if not source.isOpened():
+        print(f"❌ Error: Could not open source {args.source}")
+        return
+
+    model, backend = load_model(args.model, args.backend)
+    print(f"Model loaded! (backend: {backend})")
+    output = args.output or default_output(args.source)
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    opener = gzip.open if output.endswith(".gz") else open
+    print(f"🎥 Processing {args.source} ({source.mode} mode, {source.fps:.0f} FPS source)")
+
+    frames = detections = 0
+    start = time.perf_counter()
+    with source, opener(output, "wt") as out:
+        batch, infos = [], []
+
+        def flush():
+            nonlocal detections
+            if not batch:
+                return
+            for (index, timestamp_ms), result in zip(infos, model(batch, conf=args.conf, verbose=False)):
+                boxes, confs = results_to_arrays([result])
+                detections += len(confs)
+                out.write(json.dumps(frame_record(index, timestamp_ms, boxes, confs), separators=(",", ":")) + "\n")
+            batch.clear()
+            infos.clear()
+
+        while args.max_frames is None or frames < args.max_frames:
+            ret, frame = source.read()
+            if not ret:
+                break
+            # Same grayscale 3-channel input as the live detection scripts
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            batch.append(cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR))
+            infos.append((source.frame_index, source.timestamp_ms))
+            frames += 1
+            if len(batch) >= args.batch_size:
+                flush()
+        flush()
+
+    elapsed = time.perf_counter() - start
+    fps = frames / max(elapsed, 1e-9)
+    print(f"✅ {frames} frames, {detections} detections in {elapsed:.1f}s ({fps:.1f} FPS, "
+          f"{fps / source.fps:.1f}x realtime, {source.dropped} dropped)")
+    print(f"Detections saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
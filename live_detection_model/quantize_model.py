@@ -0,0 +1,191 @@
+import argparse
+import json
+import multiprocessing as mp
+import os
+
+import cv2
+import numpy as np
+
+from backends import exported_path, export_model, is_stale, match_detections
+from bench_backends import load_images, run_backend
+
+# Usage: python quantize_model.py --calibration test_images
+# Produces models/best_int8.onnx and a FP32 vs INT8 report in output/
+
+
+def letterbox(frame, size=640, pad_value=114):
+    """Resize keeping aspect ratio and pad to size x size, as ultralytics does before inference"""
+    height, width = frame.shape[:2]
+    scale = min(size / height, size / width)
+    new_w, new_h = int(round(width * scale)), int(round(height * scale))
+    canvas = np.full((size, size, 3), pad_value, dtype=np.uint8)
+    top, left = (size - new_h) // 2, (size - new_w) // 2
+    canvas[top:top + new_h, left:left + new_w] = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    return canvas
+
+
+class ImageCalibrationReader:
+    """Feeds calibration images to onnxruntime's static quantizer one at a time"""
+
+    def __init__(self, frames, input_name, size=640):
+        self.input_name = input_name
+        self.size = size
+        self._frames = iter(frames)
+
+    def get_next(self):
+        frame = next(self._frames, None)
+        if frame is None:
+            return None
+        # BGR HWC uint8 -> RGB NCHW float32 in [0, 1]
+        tensor = letterbox(frame, self.size)[..., ::-1].transpose(2, 0, 1)[None]
+        return {self.input_name: np.ascontiguousarray(tensor, dtype=np.float32) / 255.0}
+
+
+def head_nodes(model):
+    """Nodes that decode the detect head's outputs into boxes and scores.
+
+    Walks back from the graph output and stops at the last convolution of each
+    per-scale branch. Everything in between (DFL softmax and its fixed conv,
+    anchor/stride arithmetic, the class Sigmoid and the final Concat that puts
+    pixel coordinates and 0-1 scores into one tensor) has to stay in float: a
+    single per-tensor scale over that Concat flattens every confidence to zero.
+    """
+    producers = {output: node for node in model.graph.node for output in node.output}
+    found, pending = {}, [output.name for output in model.graph.output]
+    while pending:
+        node = producers.get(pending.pop())
+        if node is None or node.name in found:
+            continue
+        # The DFL conv has fixed weights and takes the box-distribution softmax; keep going through it
+        if node.op_type == "Conv" and not any(
+                producers.get(name) is not None and producers[name].op_type == "Softmax" for name in node.input):
+            continue
+        found[node.name] = node
+        pending.extend(node.input)
+    return [name for name in found if name]
+
+
+def count_detections(session, frame, imgsz, conf):
+    """Raw candidates above conf in one image, before NMS (output is 1 x (4 + classes) x anchors)"""
+    feed = ImageCalibrationReader([frame], session.get_inputs()[0].name, imgsz).get_next()
+    output = session.run(None, feed)[0][0]
+    return int((output[4:].max(axis=0) >= conf).sum())
+
+
+def quantize(fp32_path, int8_path, frames, imgsz, conf=0.25):
+    import onnx
+    import onnxruntime as ort
+    from onnxruntime.quantization import CalibrationMethod, QuantFormat, QuantType, quantize_static
+
+    fp32_session = ort.InferenceSession(fp32_path, providers=["CPUExecutionProvider"])
+    input_name = fp32_session.get_inputs()[0].name
+    excluded = head_nodes(onnx.load(fp32_path))
+    print(f"Keeping {len(excluded)} detect-head nodes in FP32")
+    quantize_static(
+        fp32_path,
+        int8_path,
+        ImageCalibrationReader(frames, input_name, imgsz),
+        quant_format=QuantFormat.QDQ,
+        per_channel=True,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        calibrate_method=CalibrationMethod.MinMax,
+        nodes_to_exclude=excluded,
+    )
+
+    # ultralytics reads class names, stride and imgsz from the ONNX metadata
+    fp32_model = onnx.load(fp32_path)
+    int8_model = onnx.load(int8_path)
+    del int8_model.metadata_props[:]
+    int8_model.metadata_props.extend(fp32_model.metadata_props)
+    onnx.save(int8_model, int8_path)
+    print(f"✅ INT8 model saved to {int8_path}")
+
+    # Sanity check on a sample image before spending time on the full report
+    int8_session = ort.InferenceSession(int8_path, providers=["CPUExecutionProvider"])
+    fp32_count = count_detections(fp32_session, frames[0], imgsz, conf)
+    int8_count = count_detections(int8_session, frames[0], imgsz, conf)
+    if fp32_count and not int8_count:
+        print(f"⚠️ INT8 model finds nothing above conf {conf} where FP32 finds {fp32_count} candidates")
+    else:
+        print(f"Sample image: {fp32_count} FP32 vs {int8_count} INT8 candidates above conf {conf}")
+
+
+def summarize(reference, candidate):
+    ious, conf_diffs, missed, extra = [], [], 0, 0
+    for (ref_boxes, ref_conf), (boxes, conf) in zip(reference["detections"], candidate["detections"]):
+        match = match_detections(ref_boxes, ref_conf, boxes, conf)
+        ious += match["iou"]
+        conf_diffs += match["conf_diff"]
+        missed += match["missed"]
+        extra += match["extra"]
+    return {
+        "matched_boxes": len(ious),
+        "missed_boxes": missed,
+        "extra_boxes": extra,
+        "iou_mean": float(np.mean(ious)) if ious else None,
+        "iou_min": float(np.min(ious)) if ious else None,
+        "conf_drift_mean": float(np.mean(conf_diffs)) if conf_diffs else None,
+        "conf_drift_max": float(np.max(conf_diffs)) if conf_diffs else None,
+    }
+
+
+def profile(model_path, backend, image_dir, iterations, conf):
+    """Run a backend in its own process so peak RSS is not shared between runs"""
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    worker = ctx.Process(target=run_backend, args=(model_path, backend, image_dir, iterations, conf, queue))
+    worker.start()
+    report = queue.get()
+    worker.join()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quantize the detector to INT8 and compare it with FP32")
+    parser.add_argument("--model", default="models/best.pt")
+    parser.add_argument("--calibration", default="test_images", help="Folder of sample images for calibration")
+    parser.add_argument("--eval-images", default=None, help="Folder for the accuracy report (defaults to --calibration)")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--conf", type=float, default=0.25)
+    parser.add_argument("--report", default="output/quantization_report.json")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.model):
+        print(f"❌ Model not found: {args.model}")
+        return
+    frames = load_images(args.calibration)
+    if not frames:
+        print(f"❌ No calibration images found in {args.calibration}")
+        return
+
+    fp32_path = exported_path(args.model, "onnx")
+    if not os.path.exists(fp32_path) or is_stale(args.model, "onnx"):
+        export_model(args.model, ["onnx"], imgsz=args.imgsz)
+    print(f"Calibrating on {len(frames)} images from {args.calibration}...")
+    quantize(fp32_path, exported_path(args.model, "onnx-int8"), frames, args.imgsz, args.conf)
+
+    eval_images = args.eval_images or args.calibration
+    fp32 = profile(args.model, "onnx", eval_images, args.iterations, args.conf)
+    int8 = profile(args.model, "onnx-int8", eval_images, args.iterations, args.conf)
+
+    report = summarize(fp32, int8)
+    for name, run in (("fp32", fp32), ("int8", int8)):
+        report[f"{name}_latency_ms_mean"] = float(run["latency_ms"].mean())
+        report[f"{name}_latency_ms_p95"] = float(np.percentile(run["latency_ms"], 95))
+        report[f"{name}_peak_rss_mb"] = float(run["peak_rss_mb"])
+    report["speedup"] = report["fp32_latency_ms_mean"] / report["int8_latency_ms_mean"]
+
+    print("\n📊 INT8 vs FP32 (ONNX Runtime)")
+    for key, value in report.items():
+        print(f"  {key:<22} {value:.4f}" if isinstance(value, float) else f"  {key:<22} {value}")
+
+    os.makedirs(os.path.dirname(args.report) or ".", exist_ok=True)
+    with open(args.report, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report saved to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import cv2
+import numpy as np
+
+# Class names - single class model
+class_name = 'clothes'  # Single class
+
+# Modern color scheme for bounding boxes (BGR format)
+primary_color = (0, 165, 255)      # Orange (modern, vibrant)
+secondary_color = (255, 255, 255)  # White for text
+accent_color = (0, 0, 0)           # Black for contrast
+
+font = cv2.FONT_HERSHEY_SIMPLEX
+font_scale = 0.7
+font_thickness = 2
+label_padding = 8
+box_thickness = 3
+corner_length = 15
+
+
+def results_to_arrays(results, with_classes=False):
+    """Pull (boxes xyxy, confidences[, class ids]) out of ultralytics results with one device-to-host copy"""
+    boxes = results[0].boxes
+    if boxes is None or len(boxes) == 0:
+        data = np.zeros((0, 6), dtype=np.float32)
+    else:
+        data = boxes.data.cpu().numpy()
+    if with_classes:
+        return data[:, :4], data[:, 4], data[:, 5].astype(int)
+    return data[:, :4], data[:, 4]
+
+
+def blend_rects(frame, rects, color, alpha):
+    """Blend a solid color into each (x1, y1, x2, y2) rect, touching only those pixels"""
+    height, width = frame.shape[:2]
+    for x1, y1, x2, y2 in rects:
+        x1, y1, x2, y2 = max(x1, 0), max(y1, 0), min(x2, width), min(y2, height)
+        if x2 <= x1 or y2 <= y1:
+            continue
+        roi = frame[y1:y2, x1:x2]
+        solid = np.empty_like(roi)
+        solid[:] = color
+        cv2.addWeighted(solid, alpha, roi, 1.0 - alpha, 0, dst=roi)
+
+
+def gray_out(frame, boxes, gray_frame=None):
+    """Replace every box region with its grayscale version.
+
+    Pass gray_frame when a grayscale copy of the frame already exists; its
+    pixels are copied into the boxes without converting anything twice.
+    Otherwise only the area spanned by the boxes is converted, followed by a
+    single masked copy.
+    """
+    if len(boxes) == 0:
+        return
+    if gray_frame is not None:
+        # Expand the existing grayscale pixels straight into each box, no temporaries
+        for x1, y1, x2, y2 in boxes:
+            if x2 > x1 and y2 > y1:
+                cv2.cvtColor(gray_frame[y1:y2, x1:x2], cv2.COLOR_GRAY2BGR, dst=frame[y1:y2, x1:x2])
+        return
+    ux1, uy1 = boxes[:, :2].min(axis=0)
+    ux2, uy2 = boxes[:, 2:].max(axis=0)
+    if ux2 <= ux1 or uy2 <= uy1:
+        return
+    roi = frame[uy1:uy2, ux1:ux2]
+    mask = np.zeros(roi.shape[:2], dtype=np.uint8)
+    for x1, y1, x2, y2 in boxes - [ux1, uy1, ux1, uy1]:
+        mask[y1:y2, x1:x2] = 1
+    gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+    cv2.copyTo(cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR), mask, roi)
+
+
+def draw_box(frame, x1, y1, x2, y2):
+    """Box outline with corner accents"""
+    cv2.rectangle(frame, (x1, y1), (x2, y2), primary_color, box_thickness)
+    for (ax, ay), (bx, by) in (
+            ((x1, y1), (x1 + corner_length, y1)), ((x1, y1), (x1, y1 + corner_length)),
+            ((x2 - corner_length, y1), (x2, y1)), ((x2, y1), (x2, y1 + corner_length)),
+            ((x1, y2 - corner_length), (x1, y2)), ((x1, y2), (x1 + corner_length, y2)),
+            ((x2 - corner_length, y2), (x2, y2)), ((x2, y2), (x2, y2 - corner_length))):
+        cv2.line(frame, (ax, ay), (bx, by), primary_color, box_thickness)
+
+
+def draw_detections(frame, boxes, confs, confidence=0.0, gray_neutralization=True,
+                    track_ids=None, names=None, gray_frame=None):
+    """Draw boxes and labels for every detection above the confidence threshold.
+
+    boxes/confs are numpy arrays (see results_to_arrays). names optionally gives
+    a class name per box and track_ids a track id per box for the label. All
+    label backgrounds are blended in one pass over their own pixels only.
+    """
+    height, width = frame.shape[:2]
+    keep = np.flatnonzero(np.asarray(confs) >= confidence)
+    if len(keep) == 0:
+        return
+    # Tracked boxes can drift past the frame edge between keyframes
+    pixel_boxes = np.clip(np.asarray(boxes)[keep], 0, [width, height, width, height]).astype(int)
+
+    if gray_neutralization:
+        gray_out(frame, pixel_boxes, gray_frame)
+
+    labels, label_rects = [], []
+    for i, (x1, y1, x2, y2) in zip(keep, pixel_boxes):
+        draw_box(frame, x1, y1, x2, y2)
+        name = names[i] if names is not None else class_name
+        if track_ids is None:
+            label = f'{name.upper()} {confs[i]:.2f}'
+        else:
+            label = f'{name.upper()} #{track_ids[i]} {confs[i]:.2f}'
+        text_width, text_height = cv2.getTextSize(label, font, font_scale, font_thickness)[0]
+        labels.append((label, x1 + label_padding, y1 - label_padding))
+        label_rects.append((x1, y1 - text_height - label_padding * 2, x1 + text_width + label_padding * 2, y1))
+
+    # Semi-transparent label backgrounds, then borders and text with a shadow on top
+    blend_rects(frame, label_rects, primary_color, 0.8)
+    for (label, text_x, text_y), (bx1, by1, bx2, by2) in zip(labels, label_rects):
+        cv2.rectangle(frame, (bx1, by1), (bx2, by2), primary_color, 2)
+        cv2.putText(frame, label, (text_x + 1, text_y + 1), font, font_scale, accent_color, font_thickness)
+        cv2.putText(frame, label, (text_x, text_y), font, font_scale, secondary_color, font_thickness)
+
+
+def draw_status_overlay(frame, fps, confidence, gray_neutralization):
+    """Draw the FPS / confidence / gray neutralization status panel"""
+    blend_rects(frame, [(5, 5, 201, 101)], (0, 0, 0), 0.3)
+
+    cv2.putText(frame, f'FPS: {fps:.0f}', (10, 30), font, font_scale, secondary_color, 2)
+    cv2.putText(frame, f'Conf: {confidence:.2f}', (10, 60), font, font_scale, secondary_color, 2)
+
+    # Show gray neutralization status
+    status = "ON" if gray_neutralization else "OFF"
+    status_color = (0, 255, 0) if gray_neutralization else (0, 0, 255)  # Green if ON, Red if OFF
+    cv2.putText(frame, f'Gray: {status}', (10, 90), font, font_scale, status_color, 2)
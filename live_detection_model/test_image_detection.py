@@ -1,27 +1,213 @@
-import sys
+import argparse
+import csv
+import glob
+import json
+import multiprocessing as mp
 import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
 import cv2
-from ultralytics import YOLO
+from tqdm import tqdm
 
-# Usage: python test_image_detection.py path/to/image.jpg
+from backends import BACKEND_CHOICES, load_model
+from render import draw_detections, results_to_arrays
 
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: python test_image_detection.py <image_path>")
-        return
-    image_path = sys.argv[1]
-    if not os.path.exists(image_path):
-        print(f"❌ Image not found: {image_path}")
-        return
+# Usage: python test_image_detection.py path/to/image.jpg [--backend auto|torch|onnx|openvino]
+#        python test_image_detection.py photos/ "audit/**/*.jpg" @file_list.txt --output results.jsonl
+#            [--batch-size 16] [--decode-threads 4] [--processes 4] [--save-images output/annotated]
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+MODEL_PATH = 'models/best.pt'
+
+# Per-process state for batch workers (see init_worker)
+_worker = {}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run clothing detection on one image or a batch of images")
+    parser.add_argument("inputs", nargs="+",
+                        help="Image files, directories, glob patterns, or @file containing one path per line")
+    parser.add_argument("--backend", default="auto", choices=BACKEND_CHOICES,
+                        help="Inference runtime; 'auto' picks the fastest exported model available")
+    parser.add_argument("--conf", type=float, default=0.25)
+    parser.add_argument("--output", default=None,
+                        help="Batch mode: write detections to this .jsonl or .csv file")
+    parser.add_argument("--save-images", default=None, metavar="DIR",
+                        help="Batch mode: also write annotated images to this folder")
+    parser.add_argument("--batch-size", type=int, default=16, help="Images per model call")
+    parser.add_argument("--decode-threads", type=int, default=4, help="Threads decoding images ahead of inference")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="Shard batches across this many worker processes, each with its own model")
+    return parser.parse_args()
+
+
+def collect_paths(inputs):
+    """Expand files, directories (recursively), glob patterns and @list files into image paths"""
+    paths = []
+    for item in inputs:
+        if item.startswith("@"):
+            with open(item[1:]) as f:
+                paths.extend(line.strip() for line in f if line.strip())
+        elif os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                paths.extend(os.path.join(root, name) for name in sorted(files)
+                             if name.lower().endswith(IMAGE_EXTENSIONS))
+        elif os.path.isfile(item):
+            # An existing file is taken literally, even if its name looks like a pattern (shot[1].jpg)
+            paths.append(item)
+        else:
+            # Patterns expand to their matches; a missing file matches nothing and is kept as given
+            # so it is reported unreadable
+            paths.extend(sorted(glob.glob(item, recursive=True)) or [item])
+    # Keep the first occurrence of each path
+    return list(dict.fromkeys(paths))
 
-    model_path = 'models/best.pt'
-    if not os.path.exists(model_path):
-        print(f"❌ Model not found: {model_path}")
+
+def annotated_path(save_dir, root, path):
+    """Mirror the input folder layout under save_dir so equal file names never collide"""
+    out_path = os.path.join(save_dir, os.path.relpath(os.path.abspath(path), root))
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    return out_path
+
+
+def detect_batch(model, paths, images, conf, save_dir=None, root=None):
+    """Run one model call over decoded images. Returns one record per path."""
+    records = []
+    valid = [i for i, image in enumerate(images) if image is not None]
+    results = dict(zip(valid, model([images[i] for i in valid], conf=conf, verbose=False) if valid else []))
+    # One record per input, in input order
+    for i in range(len(paths)):
+        if i not in results:
+            records.append({"path": paths[i], "error": "unreadable"})
+            continue
+        result = results[i]
+        boxes, confs, classes = results_to_arrays([result], with_classes=True)
+        names = [model.names[cls] if cls < len(model.names) else f'class_{cls}' for cls in classes]
+        height, width = images[i].shape[:2]
+        records.append({
+            "path": paths[i],
+            "width": width,
+            "height": height,
+            "detections": [
+                {"class": name, "confidence": round(float(c), 4), "box": [round(float(v), 1) for v in box]}
+                for box, c, name in zip(boxes, confs, names)
+            ],
+        })
+        if save_dir is not None:
+            draw_detections(images[i], boxes, confs, names=names)
+            cv2.imwrite(annotated_path(save_dir, root, paths[i]), images[i])
+    return records
+
+
+def decoded_batches(paths, batch_size, pool):
+    """Yield (paths, images) batches while the next batch is already being decoded"""
+    batches = [paths[i:i + batch_size] for i in range(0, len(paths), batch_size)]
+    if not batches:
         return
+    pending = [pool.submit(cv2.imread, path) for path in batches[0]]
+    for index, batch in enumerate(batches):
+        images = [future.result() for future in pending]
+        if index + 1 < len(batches):
+            pending = [pool.submit(cv2.imread, path) for path in batches[index + 1]]
+        yield batch, images
+
+
+def init_worker(model_path, backend, conf, decode_threads, save_dir, root):
+    """Load one model per worker process"""
+    model, _ = load_model(model_path, backend)
+    _worker.update(model=model, conf=conf, save_dir=save_dir, root=root,
+                   pool=ThreadPoolExecutor(max_workers=decode_threads))
+
+
+def detect_paths(paths):
+    """Worker task: decode and detect one batch of paths"""
+    images = list(_worker["pool"].map(cv2.imread, paths))
+    return detect_batch(_worker["model"], paths, images, _worker["conf"], _worker["save_dir"], _worker["root"])
+
 
+class RecordWriter:
+    """Writes detection records as JSON lines, or as CSV with one row per detection"""
+
+    def __init__(self, path):
+        self.file = open(path, "w", newline="")
+        self.csv = None
+        if path.lower().endswith(".csv"):
+            self.csv = csv.writer(self.file)
+            self.csv.writerow(["path", "class", "confidence", "x1", "y1", "x2", "y2", "error"])
+
+    def write(self, record):
+        if self.csv is None:
+            self.file.write(json.dumps(record) + "\n")
+            return
+        detections = record.get("detections") or [None]
+        for det in detections:
+            if det is None:
+                self.csv.writerow([record["path"], "", "", "", "", "", "", record.get("error", "")])
+            else:
+                self.csv.writerow([record["path"], det["class"], det["confidence"], *det["box"], ""])
+
+    def close(self):
+        self.file.close()
+
+
+def run_batch(args, paths):
+    if args.save_images:
+        os.makedirs(args.save_images, exist_ok=True)
+    output = args.output or os.path.join('output', 'detections.jsonl')
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    writer = RecordWriter(output)
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths])
+    progress = tqdm(total=len(paths), unit="img")
+    counts = {"images": 0, "detections": 0, "errors": 0}
+
+    def consume(records):
+        for record in records:
+            writer.write(record)
+            counts["images"] += 1
+            counts["detections"] += len(record.get("detections", []))
+            counts["errors"] += "error" in record
+        progress.update(len(records))
+
+    start = time.perf_counter()
+    try:
+        if args.processes > 1:
+            batches = [paths[i:i + args.batch_size] for i in range(0, len(paths), args.batch_size)]
+            # spawn keeps torch/OpenMP state out of the workers; each one loads its own model
+            with ProcessPoolExecutor(max_workers=args.processes, mp_context=mp.get_context("spawn"),
+                                     initializer=init_worker,
+                                     initargs=(MODEL_PATH, args.backend, args.conf,
+                                               args.decode_threads, args.save_images, root)) as executor:
+                pending = set()
+                for batch in batches:
+                    # Bound the work in flight so decoded images never pile up in memory
+                    if len(pending) >= args.processes * 2:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            consume(future.result())
+                    pending.add(executor.submit(detect_paths, batch))
+                for future in pending:
+                    consume(future.result())
+        else:
+            model, backend = load_model(MODEL_PATH, args.backend)
+            print(f"Model loaded! (backend: {backend})")
+            with ThreadPoolExecutor(max_workers=args.decode_threads) as pool:
+                for batch, images in decoded_batches(paths, args.batch_size, pool):
+                    consume(detect_batch(model, batch, images, args.conf, args.save_images, root))
+    finally:
+        progress.close()
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ {counts['images']} images, {counts['detections']} detections, {counts['errors']} unreadable "
+          f"in {elapsed:.1f}s ({counts['images'] / max(elapsed, 1e-9):.1f} images/sec)")
+    print(f"Results saved to {output}")
+
+
+def run_single(args, image_path):
     print("Loading model...")
-    model = YOLO(model_path)
-    print("Model loaded!")
+    model, backend = load_model(MODEL_PATH, args.backend)
+    print(f"Model loaded! (backend: {backend})")
     print("Model classes:", model.names)
     print("Single class model detected - all detections will be treated as 'clothes'")
 
@@ -32,82 +218,15 @@ def main():
         return
 
     print("Running detection...")
-    results = model(image, conf=0.25)
-
-    for result in results:
-        boxes = result.boxes
-        if boxes is not None:
-            for box in boxes:
-                x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                conf = float(box.conf[0])
-                cls = int(box.cls[0])
-                class_name = model.names[cls] if cls < len(model.names) else f'class_{cls}'
-                print(f"Detected: {class_name} (confidence: {conf:.2f}) at [{int(x1)}, {int(y1)}, {int(x2)}, {int(y2)}]")
-                
-                # Apply gray neutralization to detected object
-                detected_region = image[int(y1):int(y2), int(x1):int(x2)]
-                if detected_region.size > 0:  # Check if region is valid
-                    gray_region = cv2.cvtColor(detected_region, cv2.COLOR_BGR2GRAY)
-                    # Convert back to BGR for consistency
-                    gray_region_bgr = cv2.cvtColor(gray_region, cv2.COLOR_GRAY2BGR)
-                    # Apply the gray region back to the image
-                    image[int(y1):int(y2), int(x1):int(x2)] = gray_region_bgr
-                
-                # Modern color scheme
-                primary_color = (0, 165, 255)      # Orange
-                secondary_color = (255, 255, 255)  # White
-                accent_color = (0, 0, 0)           # Black
-                
-                # Draw modern bounding box with corner accents
-                thickness = 3
-                cv2.rectangle(image, (int(x1), int(y1)), (int(x2), int(y2)), primary_color, thickness)
-                
-                # Add corner accents
-                corner_length = 15
-                # Top-left corner
-                cv2.line(image, (int(x1), int(y1)), (int(x1) + corner_length, int(y1)), primary_color, thickness)
-                cv2.line(image, (int(x1), int(y1)), (int(x1), int(y1) + corner_length), primary_color, thickness)
-                # Top-right corner
-                cv2.line(image, (int(x2) - corner_length, int(y1)), (int(x2), int(y1)), primary_color, thickness)
-                cv2.line(image, (int(x2), int(y1)), (int(x2), int(y1) + corner_length), primary_color, thickness)
-                # Bottom-left corner
-                cv2.line(image, (int(x1), int(y2) - corner_length), (int(x1), int(y2)), primary_color, thickness)
-                cv2.line(image, (int(x1), int(y2)), (int(x1) + corner_length, int(y2)), primary_color, thickness)
-                # Bottom-right corner
-                cv2.line(image, (int(x2) - corner_length, int(y2)), (int(x2), int(y2)), primary_color, thickness)
-                cv2.line(image, (int(x2), int(y2)), (int(x2), int(y2) - corner_length), primary_color, thickness)
-                
-                # Draw modern label
-                label = f'{class_name.upper()} {conf:.2f}'
-                font_scale = 0.7
-                font_thickness = 2
-                label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, font_scale, font_thickness)[0]
-                
-                # Label background with padding
-                padding = 8
-                label_bg_x1 = int(x1)
-                label_bg_y1 = int(y1) - label_size[1] - padding * 2
-                label_bg_x2 = int(x1) + label_size[0] + padding * 2
-                label_bg_y2 = int(y1)
-                
-                # Semi-transparent background
-                overlay = image.copy()
-                cv2.rectangle(overlay, (label_bg_x1, label_bg_y1), (label_bg_x2, label_bg_y2), primary_color, -1)
-                cv2.addWeighted(overlay, 0.8, image, 0.2, 0, image)
-                
-                # Label border
-                cv2.rectangle(image, (label_bg_x1, label_bg_y1), (label_bg_x2, label_bg_y2), primary_color, 2)
-                
-                # Text with shadow effect
-                text_x = int(x1) + padding
-                text_y = int(y1) - padding
-                
-                # Text shadow
-                cv2.putText(image, label, (text_x + 1, text_y + 1), 
-                          cv2.FONT_HERSHEY_SIMPLEX, font_scale, accent_color, font_thickness)
-                # Main text
-                cv2.putText(image, label, (text_x, text_y), 
-                          cv2.FONT_HERSHEY_SIMPLEX, font_scale, secondary_color, font_thickness)
+    results = model(image, conf=args.conf)
+
+    boxes, confs, classes = results_to_arrays(results, with_classes=True)
+    names = [model.names[cls] if cls < len(model.names) else f'class_{cls}' for cls in classes]
+    for (x1, y1, x2, y2), conf, class_name in zip(boxes, confs, names):
+        print(f"Detected: {class_name} (confidence: {conf:.2f}) at [{int(x1)}, {int(y1)}, {int(x2)}, {int(y2)}]")
+
+    # Gray-neutralize and draw every detection
+    draw_detections(image, boxes, confs, names=names)
 
     # Save output image
     out_path = os.path.join('output', 'detected_output_gray.jpg')
@@ -115,5 +234,30 @@ def main():
     cv2.imwrite(out_path, image)
     print(f"Detection complete. Gray neutralized output saved to {out_path}")
 
+
+def main():
+    args = parse_args()
+    if not os.path.exists(MODEL_PATH):
+        print(f"❌ Model not found: {MODEL_PATH}")
+        return
+
+    paths = collect_paths(args.inputs)
+    single = (len(args.inputs) == 1 and os.path.isfile(args.inputs[0])
+              and args.output is None and args.save_images is None)
+    if single:
+        run_single(args, paths[0])
+        return
+
+    missing = [path for path in paths if not os.path.exists(path)]
+    if missing:
+        print(f"⚠️ Skipping {len(missing)} missing paths (first: {missing[0]})")
+        missing = set(missing)
+        paths = [path for path in paths if path not in missing]
+    if not paths:
+        print("❌ No images found")
+        return
+    print(f"Found {len(paths)} images")
+    run_batch(args, paths)
+
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -1,6 +1,8 @@
 import cv2
 import os
+import sys
 from ultralytics import YOLO
+from video_source import VideoSource
 
 def test_setup():
     """Test if everything is set up correctly"""
@@ -27,8 +29,9 @@ def test_setup():
         return False
     
     # Test 3: Check webcam
+    # Usage: python test_setup.py [camera id | video file | stream URL]
     print("Testing webcam...")
-    cap = cv2.VideoCapture(0)
+    cap = VideoSource(sys.argv[1] if len(sys.argv) > 1 else 0)
     if cap.isOpened():
         print("✅ Webcam accessible")
         ret, frame = cap.read()
@@ -0,0 +1,196 @@
+import cv2
+import numpy as np
+
+from box_ops import box_iou, cxcywh_to_xyxy, xyxy_to_cxcywh
+from motion import MotionGate
+
+# Constant-velocity motion model over [cx, cy, w, h, vcx, vcy, vw, vh]
+_F = np.eye(8, dtype=np.float64)
+_F[:4, 4:] = np.eye(4)
+
+# Noise scaled by box height, as in DeepSORT
+_POSITION_NOISE = 1.0 / 20
+_VELOCITY_NOISE = 1.0 / 160
+
+
+def greedy_match(iou, min_iou):
+    """Pair rows and columns by descending IoU. Returns (row indices, column indices)."""
+    rows, cols = [], []
+    if iou.size == 0:
+        return np.array(rows, dtype=int), np.array(cols, dtype=int)
+    candidates = np.argwhere(iou >= min_iou)
+    order = np.argsort(-iou[candidates[:, 0], candidates[:, 1]])
+    used_rows, used_cols = set(), set()
+    for r, c in candidates[order]:
+        if r not in used_rows and c not in used_cols:
+            used_rows.add(r)
+            used_cols.add(c)
+            rows.append(r)
+            cols.append(c)
+    return np.array(rows, dtype=int), np.array(cols, dtype=int)
+
+
+class Tracker:
+    """IoU + Kalman multi-object tracker (SORT with ByteTrack-style two-stage matching).
+
+    Call update() with detections on keyframes and predict() on the frames in
+    between; both return (boxes xyxy, scores, track ids) for the live tracks.
+    All tracks are stepped together with vectorized numpy Kalman filters.
+
+    high_score splits detections into the two matching stages. An unmatched
+    detection starts a new track from new_track_score up (default: high_score);
+    set it to the confidence the boxes are displayed at, or objects shown
+    without tracking never get a track.
+    """
+
+    def __init__(self, min_iou=0.3, high_score=0.5, max_misses=2, min_hits=2, new_track_score=None):
+        self.min_iou = min_iou
+        self.high_score = high_score
+        self.new_track_score = high_score if new_track_score is None else new_track_score
+        self.max_misses = max_misses
+        self.min_hits = min_hits
+        self.next_id = 1
+        self.confirmed_ids = set()
+        self._x = np.zeros((0, 8))
+        self._p = np.zeros((0, 8, 8))
+        self._ids = np.zeros(0, dtype=int)
+        self._scores = np.zeros(0)
+        self._hits = np.zeros(0, dtype=int)
+        self._misses = np.zeros(0, dtype=int)
+
+    @property
+    def unique_count(self):
+        """Number of distinct objects that were tracked long enough to be confirmed"""
+        return len(self.confirmed_ids)
+
+    def _noise(self, heights, weight):
+        std = np.repeat((weight * np.maximum(heights, 1.0))[:, None], 4, axis=1)
+        return np.einsum("ni,ij->nij", std ** 2, np.eye(4))
+
+    def _step(self):
+        if len(self._x) == 0:
+            return
+        heights = self._x[:, 3]
+        q = np.zeros_like(self._p)
+        q[:, :4, :4] = self._noise(heights, _POSITION_NOISE)
+        q[:, 4:, 4:] = self._noise(heights, _VELOCITY_NOISE)
+        self._x = self._x @ _F.T
+        self._x[:, 2:4] = np.maximum(self._x[:, 2:4], 1.0)
+        self._p = _F @ self._p @ _F.T + q
+
+    def _correct(self, idx, measurements):
+        x, p = self._x[idx], self._p[idx]
+        s = p[:, :4, :4] + self._noise(x[:, 3], _POSITION_NOISE)
+        gain = p[:, :, :4] @ np.linalg.inv(s)
+        innovation = measurements - x[:, :4]
+        self._x[idx] = x + np.einsum("nij,nj->ni", gain, innovation)
+        self._p[idx] = p - gain @ p[:, :4, :]
+
+    def _spawn(self, boxes, scores):
+        n = len(boxes)
+        x = np.zeros((n, 8))
+        x[:, :4] = xyxy_to_cxcywh(boxes)
+        p = np.zeros((n, 8, 8))
+        p[:, :4, :4] = self._noise(x[:, 3], 2 * _POSITION_NOISE)
+        p[:, 4:, 4:] = self._noise(x[:, 3], 10 * _VELOCITY_NOISE)
+        self._x = np.vstack([self._x, x])
+        self._p = np.concatenate([self._p, p])
+        self._ids = np.concatenate([self._ids, np.arange(self.next_id, self.next_id + n)])
+        self._scores = np.concatenate([self._scores, scores])
+        self._hits = np.concatenate([self._hits, np.ones(n, dtype=int)])
+        self._misses = np.concatenate([self._misses, np.zeros(n, dtype=int)])
+        self.next_id += n
+
+    def _keep(self, mask):
+        self._x, self._p = self._x[mask], self._p[mask]
+        self._ids, self._scores = self._ids[mask], self._scores[mask]
+        self._hits, self._misses = self._hits[mask], self._misses[mask]
+
+    def _output(self):
+        # Unconfirmed tracks stay visible until they miss a keyframe
+        visible = (self._hits >= self.min_hits) | (self._misses == 0)
+        return cxcywh_to_xyxy(self._x[visible, :4]), self._scores[visible], self._ids[visible]
+
+    def predict(self):
+        """Carry every track forward one frame without running the detector"""
+        self._step()
+        return self._output()
+
+    def update(self, boxes, scores):
+        """Advance one frame and correct the tracks with this keyframe's detections"""
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        scores = np.asarray(scores, dtype=np.float64).reshape(-1)
+        self._step()
+
+        matched = np.zeros(len(self._x), dtype=bool)
+        used = np.zeros(len(boxes), dtype=bool)
+        predicted = cxcywh_to_xyxy(self._x[:, :4])
+        # First confident detections, then the low-score ones against the tracks still unmatched
+        for stage in (scores >= self.high_score, scores < self.high_score):
+            det_idx = np.flatnonzero(stage & ~used)
+            trk_idx = np.flatnonzero(~matched)
+            rows, cols = greedy_match(box_iou(predicted[trk_idx], boxes[det_idx]), self.min_iou)
+            if len(rows):
+                trk, det = trk_idx[rows], det_idx[cols]
+                self._correct(trk, xyxy_to_cxcywh(boxes[det]))
+                self._scores[trk] = scores[det]
+                matched[trk] = True
+                used[det] = True
+
+        self._hits[matched] += 1
+        self._misses[matched] = 0
+        self._misses[~matched] += 1
+        self._keep(self._misses <= self.max_misses)
+
+        # Only confident leftovers start new tracks; low-score boxes are usually noise
+        new = ~used & (scores >= self.new_track_score)
+        self._spawn(boxes[new], scores[new])
+        self.confirmed_ids.update(self._ids[self._hits >= self.min_hits].tolist())
+        return self._output()
+
+
+class KeyframeScheduler(MotionGate):
+    """Decides which frames get a full detector pass.
+
+    A frame is a keyframe every `interval` frames, or earlier when the scene
+    changed by more than `motion_threshold` since the last keyframe (see MotionGate).
+    """
+
+    def __init__(self, interval=5, motion_threshold=None, size=(64, 48)):
+        super().__init__(motion_threshold, max_skip=interval - 1, size=size)
+        self.interval = interval
+
+    @property
+    def keyframes(self):
+        return self.inferred
+
+    @property
+    def frames(self):
+        return self.inferred + self.skipped
+
+    def is_keyframe(self, gray_frame):
+        return self.should_infer(gray_frame)
+
+
+class KeyframeDetector:
+    """Runs the detector on keyframes only and carries tracks forward in between.
+
+    detect_fn takes a single-channel grayscale frame and returns (boxes xyxy,
+    scores); calling the instance with a BGR frame (and optionally its
+    grayscale version) returns (boxes, scores, ids).
+    """
+
+    def __init__(self, detect_fn, tracker=None, scheduler=None):
+        self.detect_fn = detect_fn
+        self.tracker = tracker or Tracker()
+        self.scheduler = scheduler or KeyframeScheduler()
+
+    def __call__(self, frame, gray=None):
+        if gray is None:
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if self.scheduler.is_keyframe(gray):
+            return self.tracker.update(*self.detect_fn(gray))
+        return self.tracker.predict()
+
+    def keyframe_ratio(self):
+        return self.scheduler.keyframes / max(self.scheduler.frames, 1)
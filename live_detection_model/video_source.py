@@ -0,0 +1,230 @@
+import queue
+import threading
+import time
+from collections import deque
+
+import cv2
+
+from pipeline import LatestQueue
+
+SOURCE_MODES = ("auto", "realtime", "exhaustive")
+
+
+def parse_source(source):
+    """'0' -> camera 0; anything else is a file path or a stream URL"""
+    if isinstance(source, int):
+        return source
+    return int(source) if str(source).isdigit() else source
+
+
+def is_stream_url(source):
+    return isinstance(source, str) and source.split("://")[0].lower() in ("rtsp", "rtsps", "http", "https", "rtmp", "udp", "tcp")
+
+
+class VideoSource:
+    """Webcam, video file or RTSP/HTTP stream decoded on a background thread.
+
+    Decoded frames wait in a bounded buffer. In "realtime" mode the oldest
+    frame is dropped when the consumer falls behind, like a live camera, and
+    the buffer holds a single frame unless buffer_size says otherwise; in
+    "exhaustive" mode the decoder blocks so every frame is delivered. "auto"
+    picks realtime for cameras and streams and exhaustive for files. With
+    pace=True a file is decoded at its own frame rate, which makes it a
+    stand-in for a live stream in tests.
+
+    Frames are decoded straight into a fixed pool of buffers and handed out
+    without a copy. A frame returned by read() or poll() stays untouched until
+    `hold` more frames have been read. Consumers that keep frames for an
+    unbounded number of reads (a pipeline, requests in flight) pass hold=None,
+    which gives every frame its own array instead.
+
+    read() mirrors cv2.VideoCapture.read(), so a VideoSource drops in wherever
+    a capture was used; a buffer passed to it is not written to, the pooled
+    frame is returned instead. The index and timestamp of the last frame read
+    are kept in frame_index and timestamp_ms, and the perf_counter() time it
+    was decoded in captured_at.
+    """
+
+    def __init__(self, source=0, mode="auto", buffer_size=None, width=None, height=None, fps=None,
+                 pace=False, hw_decode=False, reconnect_attempts=5, hold=2):
+        if mode not in SOURCE_MODES:
+            raise ValueError(f"mode must be one of {SOURCE_MODES}")
+        self.source = parse_source(source)
+        self.is_camera = isinstance(self.source, int)
+        self.is_live = self.is_camera or is_stream_url(self.source)
+        self.mode = mode if mode != "auto" else ("realtime" if self.is_live or pace else "exhaustive")
+        self.pace = pace and not self.is_live
+        self.hw_decode = hw_decode
+        self.reconnect_attempts = reconnect_attempts if is_stream_url(self.source) else 0
+        self._settings = {cv2.CAP_PROP_FRAME_WIDTH: width, cv2.CAP_PROP_FRAME_HEIGHT: height, cv2.CAP_PROP_FPS: fps}
+        if buffer_size is None:
+            buffer_size = 1 if self.mode == "realtime" else 4
+        if self.mode == "realtime":
+            self._buffer = LatestQueue(buffer_size, on_drop=self._drop)
+        else:
+            self._buffer = queue.Queue(maxsize=buffer_size)
+        # Enough buffers for a full queue, the frame being decoded and the frames the consumer holds;
+        # None entries are allocated by the first reads
+        self._free = queue.Queue()
+        for _ in range(buffer_size + hold + 1 if hold is not None else 0):
+            self._free.put(None)
+        self._held = deque()
+        self.hold = hold
+        self._stop = threading.Event()
+        self._thread = None
+        self.cap = self._open()
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT)) if not self.is_live else 0
+        self.frames_decoded = 0
+        self.frame_index = -1
+        self.timestamp_ms = 0.0
+        self.captured_at = 0.0
+        self._finished = False
+
+    def _open(self):
+        params = []
+        # Let OpenCV pick whatever decoder acceleration the platform offers (VAAPI, D3D11, VideoToolbox...)
+        if self.hw_decode and hasattr(cv2, "CAP_PROP_HW_ACCELERATION"):
+            params = [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+        cap = cv2.VideoCapture(self.source, cv2.CAP_ANY, params) if params else cv2.VideoCapture(self.source)
+        if self.is_camera:
+            for prop, value in self._settings.items():
+                if value is not None:
+                    cap.set(prop, value)
+        if is_stream_url(self.source):
+            # Keep the driver-side queue short so frames are not stale before we even see them
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        return cap
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._decode_loop, name="decode", daemon=True)
+            self._thread.start()
+        return self
+
+    def _recycle(self, buffer):
+        if self.hold is not None:
+            self._free.put(buffer)
+
+    def _drop(self, item):
+        """Called by the realtime buffer for every stale frame it throws away"""
+        if item is not None:
+            self._recycle(item[3])
+
+    def _next_buffer(self):
+        if self.hold is None:
+            return True, None
+        while not self._stop.is_set():
+            try:
+                return True, self._free.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return False, None
+
+    def _put(self, item):
+        if self.mode == "realtime":
+            self._buffer.put(item)
+            return True
+        while not self._stop.is_set():
+            try:
+                self._buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _reconnect(self):
+        for attempt in range(self.reconnect_attempts):
+            time.sleep(min(2 ** attempt * 0.5, 8.0))
+            if self._stop.is_set():
+                return False
+            self.cap.release()
+            self.cap = self._open()
+            if self.cap.isOpened():
+                print(f"🔁 Reconnected to {self.source}")
+                return True
+        return False
+
+    def _decode_loop(self):
+        index = 0
+        started = time.perf_counter()
+        while not self._stop.is_set():
+            available, buffer = self._next_buffer()
+            if not available:
+                return
+            # Decodes in place once the buffer has the stream's size; OpenCV allocates a new one otherwise
+            ret, frame = self.cap.read(buffer)
+            if not ret:
+                self._recycle(buffer)
+                if self.reconnect_attempts and self._reconnect():
+                    continue
+                break
+            timestamp_ms = self.cap.get(cv2.CAP_PROP_POS_MSEC) if not self.is_live else \
+                (time.perf_counter() - started) * 1000
+            if self.pace:
+                # Hold the frame until its presentation time, as a live source would
+                delay = index / self.fps - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            self.frames_decoded += 1
+            if not self._put((index, timestamp_ms, time.perf_counter(), frame)):
+                return
+            index += 1
+        self._put(None)
+
+    def _take(self, timeout):
+        """Pop one decoded frame. Returns (ok, frame); frame is None if none arrived within timeout."""
+        if self._thread is None:
+            self.start()
+        if self._finished:
+            return False, None
+        try:
+            item = self._buffer.get(timeout=timeout)
+        except queue.Empty:
+            if self._thread.is_alive():
+                return True, None
+            # The decoder may have queued its last items just before exiting
+            try:
+                item = self._buffer.get(timeout=0)
+            except queue.Empty:
+                self._finished = True
+                return False, None
+        if item is None:
+            self._finished = True
+            return False, None
+        self.frame_index, self.timestamp_ms, self.captured_at, frame = item
+        if self.hold is not None:
+            self._held.append(frame)
+            if len(self._held) > self.hold:
+                self._recycle(self._held.popleft())
+        return True, frame
+
+    def read(self, image=None):
+        """Return (ok, frame) like cv2.VideoCapture.read(); ok is False once the source is exhausted"""
+        while True:
+            ret, frame = self._take(0.1)
+            if not ret or frame is not None:
+                return ret, frame
+
+    def poll(self):
+        """Non-blocking read: (ok, frame), where frame is None when no new frame has been decoded yet"""
+        return self._take(0)
+
+    @property
+    def dropped(self):
+        return getattr(self._buffer, "dropped", 0)
+
+    def release(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        self.cap.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
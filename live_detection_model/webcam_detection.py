@@ -1,207 +1,250 @@
+import argparse
 import cv2
-from ultralytics import YOLO
 import time
 import os
 import numpy as np
+from backends import BACKEND_CHOICES, load_model
+from frame_buffers import FrameRing
+from pipeline import DetectionPipeline
+from render import draw_detections, draw_status_overlay, results_to_arrays
+from motion import GatedDetector, MotionGate
+from tracker import KeyframeDetector, KeyframeScheduler, Tracker
+from video_source import SOURCE_MODES, VideoSource
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Real-time clothing detection")
+    parser.add_argument("--source", default="0",
+                        help="Camera id, video file, or RTSP/HTTP URL")
+    parser.add_argument("--source-mode", default="auto", choices=SOURCE_MODES,
+                        help="realtime drops frames when behind; exhaustive shows every frame (default for files)")
+    parser.add_argument("--pipelined", action="store_true",
+                        help="Run capture, inference and rendering on separate threads")
+    parser.add_argument("--queue-size", type=int, default=1,
+                        help="Frames buffered between pipeline stages (stale frames are dropped in realtime mode)")
+    parser.add_argument("--backend", default="auto", choices=BACKEND_CHOICES,
+                        help="Inference runtime; 'auto' picks the fastest exported model available")
+    parser.add_argument("--track", action="store_true",
+                        help="Run the detector on keyframes only and track boxes in between")
+    parser.add_argument("--keyframe-interval", type=int, default=5,
+                        help="With --track, run the detector at least every N frames")
+    parser.add_argument("--motion-threshold", type=float, default=None,
+                        help="With --track, also run the detector when the scene changes by more than this (0-255)")
+    parser.add_argument("--motion-gate", type=float, default=None, metavar="THRESHOLD",
+                        help="Skip inference and reuse the last detections until the scene changes by more than this (0-255)")
+    parser.add_argument("--max-skip", type=int, default=30,
+                        help="With --motion-gate, never skip more than this many frames in a row")
+    return parser.parse_args()
+
+
+def run_model(model, gray_frame, confidence, out=None):
+    """Run the detector on a single-channel grayscale frame, expanding it into `out` if given"""
+    gray_frame_3ch = cv2.cvtColor(gray_frame, cv2.COLOR_GRAY2BGR, dst=out)
+    return results_to_arrays(model(gray_frame_3ch, conf=confidence, verbose=False))
+
+
+def make_detector(model, settings, args):
+    """Returns a callable mapping a BGR frame (and optionally its grayscale version)
+    to (boxes, confidences, track ids or None)"""
+    model_input = None
+
+    def detect_gray(gray_frame):
+        nonlocal model_input
+        # Only the inference thread runs this, so one 3-channel buffer is reused for every frame
+        if model_input is None or model_input.shape[:2] != gray_frame.shape:
+            model_input = np.empty((*gray_frame.shape, 3), dtype=np.uint8)
+        return run_model(model, gray_frame, settings['confidence'], out=model_input)
+
+    if args.track:
+        scheduler = KeyframeScheduler(args.keyframe_interval, args.motion_threshold)
+        tracker = Tracker(new_track_score=settings['confidence'])
+
+        def detect_keyframe(gray_frame):
+            # New tracks start at the displayed confidence, which 'c' can change while running
+            tracker.new_track_score = settings['confidence']
+            return detect_gray(gray_frame)
+
+        detector = KeyframeDetector(detect_keyframe, tracker, scheduler)
+    else:
+        def detector(frame, gray=None):
+            if gray is None:
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            return (*detect_gray(gray), None)
+
+    if args.motion_gate is not None:
+        # Static scene: keep showing the previous boxes (and frozen tracks) without touching the model
+        detector = GatedDetector(detector, MotionGate(args.motion_gate, args.max_skip))
+    return detector
+
+
+def report_detector(detector):
+    """Print how often the model ran and how many distinct objects were tracked"""
+    if isinstance(detector, GatedDetector):
+        print(f"💤 Motion gate: {detector.gate.format()}")
+        detector = detector.detect_fn
+    if isinstance(detector, KeyframeDetector):
+        print(f"🎯 Keyframes: {detector.scheduler.keyframes}/{detector.scheduler.frames} "
+              f"({detector.keyframe_ratio():.0%}) | unique objects: {detector.tracker.unique_count}")
+
+
+def handle_key(key, settings, display_frame):
+    """Handle a key press. Returns False when the user asked to quit."""
+    if key == ord('q'):
+        return False
+    elif key == ord('s'):
+        # Save screenshot
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
+        filename = f"output/screenshot_{timestamp}.jpg"
+        cv2.imwrite(filename, display_frame)
+        print(f"📸 Screenshot saved as {filename}")
+    elif key == ord('c'):
+        # Change confidence threshold
+        try:
+            new_conf = float(input("Enter new confidence threshold (0.1-1.0): "))
+            if 0.1 <= new_conf <= 1.0:
+                settings['confidence'] = new_conf
+                print(f"Confidence threshold changed to {new_conf}")
+            else:
+                print("Invalid confidence value. Must be between 0.1 and 1.0")
+        except ValueError:
+            print("Invalid input. Confidence threshold unchanged.")
+    elif key == ord('g'):
+        # Toggle gray neutralization
+        settings['gray_neutralization'] = not settings['gray_neutralization']
+        status = "ON" if settings['gray_neutralization'] else "OFF"
+        print(f"Gray neutralization: {status}")
+    return True
+
+
+def run_sequential(cap, detector, settings):
+    """Capture, infer and render one frame at a time on the main thread"""
+    # Performance tracking
+    fps_counter = 0
+    fps_start_time = time.time()
+    fps = 0
+
+    # Capture, grayscale and display buffers are allocated once and reused
+    ring = FrameRing(size=2)
+
+    while True:
+        # Read frame; the slot also holds its grayscale version and a copy for drawing
+        slot = ring.next()
+        if not slot.read(cap):
+            print("Error: Could not read frame")
+            break
+
+        confidence = settings['confidence']
+        gray_neutralization = settings['gray_neutralization']
+        display_frame = slot.display
+
+        # Run detection on grayscale frame (or carry tracks forward between keyframes)
+        boxes, confs, track_ids = detector(slot.frame, slot.gray)
+
+        # Draw detections; neutralized regions are copied from the existing grayscale frame
+        draw_detections(display_frame, boxes, confs, confidence, gray_neutralization, track_ids,
+                        gray_frame=slot.gray)
+
+        # Calculate and draw FPS
+        fps_counter += 1
+        if time.time() - fps_start_time >= 1.0:
+            fps = fps_counter
+            fps_counter = 0
+            fps_start_time = time.time()
+
+        draw_status_overlay(display_frame, fps, confidence, gray_neutralization)
+
+        # Display frame
+        cv2.imshow('Real-time Clothing Detection - Modern UI', display_frame)
+
+        # Handle key presses
+        key = cv2.waitKey(1) & 0xFF
+        if not handle_key(key, settings, display_frame):
+            break
+
+
+def run_pipelined(cap, detector, settings, queue_size):
+    """Capture and inference run on worker threads; rendering stays on the main thread"""
+    pipeline = DetectionPipeline(cap, detector, queue_size=queue_size).start()
+    last_report = time.perf_counter()
+    try:
+        for frame, results in pipeline.results():
+            render_start = time.perf_counter()
+            confidence = settings['confidence']
+            gray_neutralization = settings['gray_neutralization']
+            # The capture thread hands over a fresh frame each time, so draw on it directly
+            display_frame = frame
+            boxes, confs, track_ids = results
+            draw_detections(display_frame, boxes, confs, confidence, gray_neutralization, track_ids)
+            draw_status_overlay(display_frame, pipeline.fps, confidence, gray_neutralization)
+            cv2.imshow('Real-time Clothing Detection - Modern UI', display_frame)
+            key = cv2.waitKey(1) & 0xFF
+            pipeline.stats.record("render", time.perf_counter() - render_start)
+            if not handle_key(key, settings, display_frame):
+                break
+
+            # Report where each frame's time goes once per second
+            if time.perf_counter() - last_report >= 1.0:
+                last_report = time.perf_counter()
+                print(f"⏱️  FPS: {pipeline.fps:.1f} | {pipeline.stats.format()} | "
+                      f"dropped: {pipeline.dropped_frames()}")
+    finally:
+        pipeline.stop()
+
 
 def main():
+    args = parse_args()
+
     # Model path - update this to your trained model location
     model_path = '/Users/shaanpatel/Desktop/Personal/solo/model tests/local_detection_system/live_detection_model/models/best.pt'
-    
+
     # Check if model exists
     if not os.path.exists(model_path):
         print(f"❌ Error: Model not found at {model_path}")
         print("Please download the trained model to the 'models' folder")
         return
-    
+
     # Load the trained model
     print("Loading model...")
-    model = YOLO(model_path)
-    print("Model loaded successfully!")
-    
-    # Initialize webcam
-    cap = cv2.VideoCapture(0)  # Use 0 for default camera
-    
+    model, backend = load_model(model_path, args.backend)
+    print(f"Model loaded successfully! (backend: {backend})")
+
+    # Initialize the video source (default camera 0); decoding runs on its own thread.
+    # The webcam properties only apply to cameras. Pipelined stages keep frames for as long
+    # as inference takes, so they get their own arrays instead of pooled buffers.
+    cap = VideoSource(args.source, mode=args.source_mode, width=640, height=480, fps=30,
+                      hold=None if args.pipelined else 2)
+
     if not cap.isOpened():
-        print("❌ Error: Could not open webcam")
+        print(f"❌ Error: Could not open video source {args.source}")
         print("Try changing camera ID (1, 2, etc.) or check webcam permissions")
         return
-    
-    # Set webcam properties for better performance
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-    cap.set(cv2.CAP_PROP_FPS, 30)
-    
-    # Class names - single class model
-    class_name = 'clothes'  # Single class
-    
-    # Modern color scheme for bounding boxes (BGR format)
-    primary_color = (0, 165, 255)      # Orange (modern, vibrant)
-    secondary_color = (255, 255, 255)  # White for text
-    accent_color = (0, 0, 0)           # Black for contrast
-    
-    # Performance tracking
-    fps_counter = 0
-    fps_start_time = time.time()
-    fps = 0
-    
+
     print("🎥 Real-time detection started!")
     print("Controls:")
     print("- Press 'q' to quit")
     print("- Press 's' to save screenshot")
     print("- Press 'c' to change confidence threshold")
     print("- Press 'g' to toggle gray neutralization")
-    
-    confidence = 0.23
-    gray_neutralization = True  # Enable gray neutralization by default
-    
-    while True:
-        # Read frame
-        ret, frame = cap.read()
-        if not ret:
-            print("Error: Could not read frame")
-            break
-        
-        # Convert frame to grayscale and back to 3-channel for model input
-        gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        gray_frame_3ch = cv2.cvtColor(gray_frame, cv2.COLOR_GRAY2BGR)
-
-        # Create a copy for drawing
-        display_frame = frame.copy()
-        
-        # Run detection on grayscale frame
-        results = model(gray_frame_3ch, conf=confidence, verbose=False)
-        
-        # Draw detections
-        for result in results:
-            boxes = result.boxes
-            if boxes is not None:
-                for box in boxes:
-                    # Get box coordinates
-                    x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                    x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
-                    
-                    # Get confidence and class
-                    conf = float(box.conf[0])
-                    cls = int(box.cls[0])
-                    
-                    if conf >= confidence:
-                        # Apply gray neutralization to detected object
-                        if gray_neutralization:
-                            # Convert the detected region to grayscale
-                            detected_region = display_frame[y1:y2, x1:x2]
-                            if detected_region.size > 0:  # Check if region is valid
-                                gray_region = cv2.cvtColor(detected_region, cv2.COLOR_BGR2GRAY)
-                                # Convert back to BGR for consistency
-                                gray_region_bgr = cv2.cvtColor(gray_region, cv2.COLOR_GRAY2BGR)
-                                # Apply the gray region back to the display frame
-                                display_frame[y1:y2, x1:x2] = gray_region_bgr
-                        
-                        # Draw modern bounding box with rounded corners effect
-                        thickness = 3
-                        cv2.rectangle(display_frame, (x1, y1), (x2, y2), primary_color, thickness)
-                        
-                        # Add corner accents for modern look
-                        corner_length = 15
-                        # Top-left corner
-                        cv2.line(display_frame, (x1, y1), (x1 + corner_length, y1), primary_color, thickness)
-                        cv2.line(display_frame, (x1, y1), (x1, y1 + corner_length), primary_color, thickness)
-                        # Top-right corner
-                        cv2.line(display_frame, (x2 - corner_length, y1), (x2, y1), primary_color, thickness)
-                        cv2.line(display_frame, (x2, y1), (x2, y1 + corner_length), primary_color, thickness)
-                        # Bottom-left corner
-                        cv2.line(display_frame, (x1, y2 - corner_length), (x1, y2), primary_color, thickness)
-                        cv2.line(display_frame, (x1, y2), (x1 + corner_length, y2), primary_color, thickness)
-                        # Bottom-right corner
-                        cv2.line(display_frame, (x2 - corner_length, y2), (x2, y2), primary_color, thickness)
-                        cv2.line(display_frame, (x2, y2), (x2, y2 - corner_length), primary_color, thickness)
-                        
-                        # Draw modern label with gradient effect
-                        label = f'{class_name.upper()} {conf:.2f}'
-                        font_scale = 0.7
-                        font_thickness = 2
-                        label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, font_scale, font_thickness)[0]
-                        
-                        # Label background with padding
-                        padding = 8
-                        label_bg_x1 = x1
-                        label_bg_y1 = y1 - label_size[1] - padding * 2
-                        label_bg_x2 = x1 + label_size[0] + padding * 2
-                        label_bg_y2 = y1
-                        
-                        # Draw semi-transparent background
-                        overlay = display_frame.copy()
-                        cv2.rectangle(overlay, (label_bg_x1, label_bg_y1), (label_bg_x2, label_bg_y2), primary_color, -1)
-                        cv2.addWeighted(overlay, 0.8, display_frame, 0.2, 0, display_frame)
-                        
-                        # Draw label border
-                        cv2.rectangle(display_frame, (label_bg_x1, label_bg_y1), (label_bg_x2, label_bg_y2), primary_color, 2)
-                        
-                        # Draw label text with shadow effect
-                        text_x = x1 + padding
-                        text_y = y1 - padding
-                        
-                        # Text shadow
-                        cv2.putText(display_frame, label, (text_x + 1, text_y + 1), 
-                                  cv2.FONT_HERSHEY_SIMPLEX, font_scale, accent_color, font_thickness)
-                        # Main text
-                        cv2.putText(display_frame, label, (text_x, text_y), 
-                                  cv2.FONT_HERSHEY_SIMPLEX, font_scale, secondary_color, font_thickness)
-        
-        # Calculate and draw FPS
-        fps_counter += 1
-        if time.time() - fps_start_time >= 1.0:
-            fps = fps_counter
-            fps_counter = 0
-            fps_start_time = time.time()
-        
-        # Draw modern status overlay
-        overlay = display_frame.copy()
-        cv2.rectangle(overlay, (5, 5), (200, 100), (0, 0, 0), -1)
-        cv2.addWeighted(overlay, 0.3, display_frame, 0.7, 0, display_frame)
-        
-        # Draw FPS and confidence with modern styling
-        cv2.putText(display_frame, f'FPS: {fps}', (10, 30), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, secondary_color, 2)
-        cv2.putText(display_frame, f'Conf: {confidence:.2f}', (10, 60), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, secondary_color, 2)
-        
-        # Show gray neutralization status
-        status = "ON" if gray_neutralization else "OFF"
-        status_color = (0, 255, 0) if gray_neutralization else (0, 0, 255)  # Green if ON, Red if OFF
-        cv2.putText(display_frame, f'Gray: {status}', (10, 90), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, status_color, 2)
-        
-        # Display frame
-        cv2.imshow('Real-time Clothing Detection - Modern UI', display_frame)
-        
-        # Handle key presses
-        key = cv2.waitKey(1) & 0xFF
-        if key == ord('q'):
-            break
-        elif key == ord('s'):
-            # Save screenshot
-            timestamp = time.strftime("%Y%m%d_%H%M%S")
-            filename = f"output/screenshot_{timestamp}.jpg"
-            cv2.imwrite(filename, display_frame)
-            print(f"📸 Screenshot saved as {filename}")
-        elif key == ord('c'):
-            # Change confidence threshold
-            try:
-                new_conf = float(input("Enter new confidence threshold (0.1-1.0): "))
-                if 0.1 <= new_conf <= 1.0:
-                    confidence = new_conf
-                    print(f"Confidence threshold changed to {confidence}")
-                else:
-                    print("Invalid confidence value. Must be between 0.1 and 1.0")
-            except ValueError:
-                print("Invalid input. Confidence threshold unchanged.")
-        elif key == ord('g'):
-            # Toggle gray neutralization
-            gray_neutralization = not gray_neutralization
-            status = "ON" if gray_neutralization else "OFF"
-            print(f"Gray neutralization: {status}")
-    
+
+    settings = {
+        'confidence': 0.23,
+        'gray_neutralization': True,  # Enable gray neutralization by default
+    }
+
+    detector = make_detector(model, settings, args)
+    if args.track:
+        print(f"🎯 Tracking mode: detector runs every {args.keyframe_interval} frames")
+    if args.motion_gate is not None:
+        print(f"💤 Motion gate: static frames reuse the last detections (up to {args.max_skip} in a row)")
+
+    if args.pipelined:
+        print("🧵 Pipelined mode: capture, inference and render run concurrently"
+              f" ({'dropping stale frames' if cap.mode == 'realtime' else 'every frame'})")
+        run_pipelined(cap, detector, settings, args.queue_size)
+    else:
+        run_sequential(cap, detector, settings)
+    report_detector(detector)
+
     # Cleanup
     cap.release()
     cv2.destroyAllWindows()
@@ -1,75 +1,321 @@
+import argparse
+import os
+import sys
+import time
+from typing import List, Optional
+# Sets up prometheus_client multiprocess mode, so it comes before anything that may import it
+from metrics import MetricsMiddleware, StageTimer, add_metrics_route, prune_metrics_dir
+from fastapi import HTTPException
 from pydantic import BaseModel
 from litserve.mcp import MCP
 import litserve as ls
-from PIL import Image, ImageOps
-from ultralytics import YOLO
+from PIL import Image
 import base64
+import binascii
 import cv2
 import numpy as np
 from io import BytesIO
 
+# The model backends are shared with the live detection scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "live_detection_model"))
+from backends import BACKEND_CHOICES, load_model
+from detection_cache import CACHE_MODES, DetectionCache
+from shm_transport import SharedFrameReader
+
+# Model input: INPUT_SIZE x INPUT_SIZE by default, letterboxed with the ultralytics gray padding
+INPUT_SIZE = 640
+PAD_VALUE = 114
+# Allowed per-request imgsz values (the model stride is 32)
+MIN_IMGSZ, MAX_IMGSZ = 160, 1280
+
 
 # Define the request schema for analysis
+# Exactly one image source must be given: a path, an encoded image, a raw frame or a shared-memory frame
 class AnalysisRequest(BaseModel):
-    data_path: str  # Path to the input image
-    threshold: float = 0.5  # Optional threshold parameter (default 0.5)
+    data_path: Optional[str] = None  # Path to the input image (server-local)
+    encoded_image: Optional[str] = None  # Base64 of an encoded image file (JPEG, PNG, ...)
+    raw_frame: Optional[str] = None  # Base64 of raw uint8 pixels (BGR, row-major)
+    shm_name: Optional[str] = None  # Shared-memory block holding the frame (same machine only, see shm_transport.py)
+    shm_offset: int = 0  # Byte offset of the frame inside shm_name
+    shm_seq: Optional[int] = None  # Sequence number the client wrote in front of the frame
+    frame_shape: Optional[List[int]] = None  # [height, width] or [height, width, channels] of raw_frame / shm frame
+    threshold: float = 0.5  # Confidence threshold, applied inside the model's NMS
+    iou: float = 0.7  # NMS IoU threshold
+    max_det: int = 300  # Keep at most this many boxes, highest confidence first
+    classes: Optional[List[int]] = None  # Only return these class ids
+    imgsz: Optional[int] = None  # Model input size, a multiple of 32 (default 640)
+    return_image: bool = False  # Also return the annotated image as base64 JPEG
 
 # Define the custom LitAPI for YOLOv11n
 class YoloV11n(ls.LitAPI):
+    def __init__(self, backend: str = "auto", cache_size: int = 256, cache_ttl: float = 60.0,
+                 cache_mode: str = "exact", cache_distance: int = 4, **kwargs):
+        super().__init__(**kwargs)
+        self.backend = backend
+        self.cache_settings = {"max_entries": cache_size, "ttl": cache_ttl, "mode": cache_mode,
+                               "max_distance": cache_distance}
+
     def setup(self, device: str):
         # Path to the local YOLO model weights
         model_path = "/Users/shaanpatel/Desktop/Personal/solo/model tests/local_detection_system/live_detection_model/models/best.pt"
         #model_path="/Users/shaanpatel/Desktop/Personal/solo/model tests/local_detection_system/lxive_detection_model/models/oldmodel.pt"
-        self.model = YOLO(model_path)
+        self.stage_timer = StageTimer("yolo")
+        load_start = time.perf_counter()
+        self.model, self.backend = load_model(model_path, self.backend)
+        self.stage_timer.model_loaded(time.perf_counter() - load_start)
+        # Shared-memory blocks stay mapped between requests
+        self.shared_frames = SharedFrameReader()
+        self.letterbox_buffers = {}
+        # Duplicate frames (static scenes, client retries) are answered without the model
+        self.cache = DetectionCache(**self.cache_settings) if self.cache_settings["max_entries"] > 0 else None
         
     def decode_request(self, request: AnalysisRequest):
         # Convert the incoming request to a dictionary for inference
-        return {"data": request.data_path, "threshold": request.threshold}
-
-    def preprocess_for_inference(self, image_path):
-
-        # 1. Auto-orient
-        img = Image.open(image_path)
-        img = ImageOps.exif_transpose(img)
-        # 2. Resize to 640x640 (stretch)
-        img = img.resize((640, 640), Image.BILINEAR)
-        # 3. Convert to grayscale
-        img = img.convert("L")
-        # 4. Convert grayscale to 3-channel
-        img_np = np.array(img)
-        img_gray_3ch = cv2.cvtColor(img_np, cv2.COLOR_GRAY2BGR)
-        return img_gray_3ch
-
-    def predict(self, inputs: dict):
-        image_path = inputs["data"]
-        # Preprocess image for inference (minimal, robust)
-        frame = self.preprocess_for_inference(image_path)
-        # Inference
-        results = self.model(frame)
-        result = results[0]
+        start = time.perf_counter()
+        params = self.inference_params(request)
+        source = self.decode_image_source(request)
+        gray = self.decode_grayscale(source)
+        if request.shm_name is not None:
+            gray = self.detach_shared_frame(gray, source, request)
+        return {
+            "data": gray,
+            "params": params,
+            "return_image": request.return_image,
+            "timings": {"decode": (time.perf_counter() - start) * 1000},
+        }
+
+    def inference_params(self, request: AnalysisRequest):
+        """Validate the filtering controls. Returns a hashable tuple so requests can be grouped by it."""
+        imgsz = request.imgsz or INPUT_SIZE
+        if not MIN_IMGSZ <= imgsz <= MAX_IMGSZ or imgsz % 32:
+            raise HTTPException(status_code=400,
+                                detail=f"imgsz must be a multiple of 32 between {MIN_IMGSZ} and {MAX_IMGSZ}")
+        if not 0.0 <= request.threshold <= 1.0 or not 0.0 <= request.iou <= 1.0:
+            raise HTTPException(status_code=400, detail="threshold and iou must be between 0 and 1")
+        if request.max_det < 1:
+            raise HTTPException(status_code=400, detail="max_det must be at least 1")
+        classes = tuple(sorted(set(request.classes))) if request.classes is not None else None
+        return request.threshold, request.iou, request.max_det, classes, imgsz
+
+    def decode_image_source(self, request: AnalysisRequest):
+        """Return a path, encoded image bytes or a numpy frame without touching the disk"""
+        sources = [s for s in (request.data_path, request.encoded_image, request.raw_frame, request.shm_name)
+                   if s is not None]
+        if len(sources) != 1:
+            raise HTTPException(status_code=400,
+                                detail="Provide exactly one of data_path, encoded_image, raw_frame or shm_name")
+        if request.data_path is not None:
+            return request.data_path
+        try:
+            if request.encoded_image is not None:
+                return base64.b64decode(request.encoded_image, validate=True)
+            if not request.frame_shape:
+                raise HTTPException(status_code=400, detail="raw_frame and shm_name require frame_shape")
+            shape = request.frame_shape
+            if len(shape) not in (2, 3) or (len(shape) == 3 and shape[2] not in (1, 3, 4)):
+                raise HTTPException(status_code=400,
+                                    detail="frame_shape must be [height, width] or [height, width, 1|3|4]")
+            if request.shm_name is not None:
+                # Zero-copy view; shm_seq is checked once the frame has been copied out of the slot
+                return self.shared_frames.view(request.shm_name, request.shm_offset, request.frame_shape)
+            buffer = np.frombuffer(base64.b64decode(request.raw_frame, validate=True), dtype=np.uint8)
+            return buffer.reshape(request.frame_shape)
+        except (binascii.Error, ValueError, FileNotFoundError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid image payload: {e}")
+
+    def detach_shared_frame(self, gray: np.ndarray, source: np.ndarray, request: AnalysisRequest):
+        """Make sure the frame no longer depends on its shared-memory slot and was not overwritten while read"""
+        if np.shares_memory(gray, source):
+            gray = gray.copy()
+        if request.shm_seq is not None and \
+                self.shared_frames.sequence(request.shm_name, request.shm_offset) != request.shm_seq:
+            raise HTTPException(status_code=409,
+                                detail="Shared-memory slot was reused before the frame was read; resend the frame")
+        return gray
+
+    def decode_grayscale(self, image_source):
+        """Decode any image source straight to a single-channel uint8 image"""
+        # imread/imdecode apply the EXIF orientation, like ImageOps.exif_transpose did
+        if isinstance(image_source, str):
+            gray = cv2.imread(image_source, cv2.IMREAD_GRAYSCALE)
+        elif isinstance(image_source, bytes):
+            gray = cv2.imdecode(np.frombuffer(image_source, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+        elif image_source.ndim == 2 or image_source.shape[2] == 1:
+            gray = image_source.reshape(image_source.shape[:2])
+        elif image_source.shape[2] == 4:
+            gray = cv2.cvtColor(image_source, cv2.COLOR_BGRA2GRAY)
+        else:
+            gray = cv2.cvtColor(image_source, cv2.COLOR_BGR2GRAY)
+        if gray is None:
+            raise HTTPException(status_code=400, detail="Could not decode image")
+        return gray
+
+    def letterbox(self, gray: np.ndarray, out: np.ndarray):
+        """Resize once into the middle of a padded square buffer, keeping the aspect ratio.
+
+        Returns (scale, pad_x, pad_y) to map boxes back to the original image.
+        """
+        height, width = gray.shape
+        size = out.shape[0]
+        scale = min(size / height, size / width)
+        new_w, new_h = max(1, round(width * scale)), max(1, round(height * scale))
+        pad_x, pad_y = (size - new_w) // 2, (size - new_h) // 2
+        out.fill(PAD_VALUE)
+        cv2.resize(gray, (new_w, new_h), dst=out[pad_y:pad_y + new_h, pad_x:pad_x + new_w],
+                   interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR)
+        return scale, pad_x, pad_y
+
+    def input_buffers(self, count: int, size: int = INPUT_SIZE):
+        # One letterbox buffer per batch slot and input size, reused across batches
+        buffers = self.letterbox_buffers.setdefault(size, [])
+        while len(buffers) < count:
+            buffers.append(np.full((size, size), PAD_VALUE, dtype=np.uint8))
+        return buffers[:count]
+
+    def batch(self, inputs: list):
+        # Keep the decoded requests as a list; frames are stacked inside predict
+        return inputs
+
+    def predict(self, inputs):
+        # LitServe passes a list of requests when dynamic batching is enabled
+        batched = isinstance(inputs, list)
+        items = inputs if batched else [inputs]
+        outputs = [None] * len(items)
+        # Requests with the same filtering controls share one model call
+        groups = {}
+        for index, item in enumerate(items):
+            cached = self.cache_lookup(item)
+            if cached is not None:
+                outputs[index] = cached
+            else:
+                groups.setdefault(item["params"], []).append(index)
+        for params, indices in groups.items():
+            for index, output in zip(indices, self.predict_group([items[i] for i in indices], params)):
+                if self.cache is not None and "cache_key" in items[index]:
+                    self.cache.put(items[index]["cache_key"],
+                                   {"result": output["result"], "confidence": output["confidence"]})
+                    output["cache_stats"] = self.cache.stats()
+                outputs[index] = output
+        return outputs if batched else outputs[0]
+
+    def cache_lookup(self, item: dict):
+        """Return a finished output for a frame seen before, or None"""
+        # Annotated images are not cached, so those requests always run the model
+        if self.cache is None or item["return_image"]:
+            return None
+        start = time.perf_counter()
+        item["cache_key"] = self.cache.make_key(item["data"], item["params"])
+        cached = self.cache.get(item["cache_key"])
+        timings = item["timings"]
+        timings["cache"] = (time.perf_counter() - start) * 1000
+        self.stage_timer.cache(cached is not None)
+        if cached is None:
+            return None
+        return {**cached, "timings": {stage: round(ms, 3) for stage, ms in timings.items()},
+                "cache_hit": True, "cache_stats": self.cache.stats()}
+
+    def predict_group(self, items: list, params: tuple):
+        conf, iou, max_det, classes, imgsz = params
+        frames, transforms = [], []
+        for item, buffer in zip(items, self.input_buffers(len(items), imgsz)):
+            start = time.perf_counter()
+            transforms.append(self.letterbox(item["data"], buffer))
+            # The model wants 3 channels; a broadcast view adds them without copying the pixels
+            frames.append(np.broadcast_to(buffer[..., None], buffer.shape + (3,)))
+            item["timings"]["preprocess"] = (time.perf_counter() - start) * 1000
+        # Inference: a single ultralytics call per group; filtering happens in its NMS
+        start = time.perf_counter()
+        results = self.model(frames, conf=conf, iou=iou, max_det=max_det,
+                             classes=list(classes) if classes is not None else None,
+                             imgsz=imgsz, verbose=False)
+        inference = (time.perf_counter() - start) * 1000
+        # Observed once per model call; per-request stages are observed in encode_response
+        self.stage_timer.observe("inference", inference / 1000)
+        self.stage_timer.batch(len(items))
+        outputs = []
+        for item, result, transform in zip(items, results, transforms):
+            start = time.perf_counter()
+            output = self.format_result(result, transform, item["data"].shape)
+            timings = item["timings"]
+            timings["inference"] = inference
+            timings["postprocess"] = (time.perf_counter() - start) * 1000
+            # Rendering and encoding cost several ms per frame, so only do it on request
+            if item["return_image"]:
+                start = time.perf_counter()
+                output["image_base64"] = self.encode_annotated_image(result)
+                timings["render"] = (time.perf_counter() - start) * 1000
+            output["timings"] = {stage: round(ms, 3) for stage, ms in timings.items()}
+            outputs.append(output)
+        return outputs
+
+    def unbatch(self, output: list):
+        # Route each result back to the request it came from
+        return output
+
+    def format_result(self, result, transform, image_shape):
+        scale, pad_x, pad_y = transform
+        height, width = image_shape
+        # Undo the letterbox so boxes are in the coordinates of the image that was sent
+        boxes = result.boxes.xyxy.cpu().numpy()
+        boxes = (boxes - np.array([pad_x, pad_y, pad_x, pad_y], dtype=boxes.dtype)) / scale
+        np.clip(boxes[:, 0::2], 0, width, out=boxes[:, 0::2])
+        np.clip(boxes[:, 1::2], 0, height, out=boxes[:, 1::2])
+        return {
+            "result": boxes.tolist(),
+            "confidence": result.boxes.conf.tolist(),
+        }
+
+    def encode_annotated_image(self, result):
         # Draw bounding boxes on the image
         boxed_img = result.plot()  # numpy array (BGR)
         # Convert to PIL Image (for base64 encoding)
         img_pil = Image.fromarray(boxed_img[..., ::-1])
         buffer = BytesIO()
         img_pil.save(buffer, format="JPEG")
-        img_str = base64.b64encode(buffer.getvalue()).decode("utf-8")
-        return {
-            "result": result.boxes.xyxy.tolist(),
-            "confidence": result.boxes.conf.tolist(),
-            "image_base64": img_str
-        }
+        return base64.b64encode(buffer.getvalue()).decode("utf-8")
         
     def encode_response(self, output: dict):
+        start = time.perf_counter()
+        self.stage_timer.observe_ms(output["timings"], skip=("inference",))
         # Format the output for the API response
-        return {"result": output["result"], "confidence": output["confidence"]}
+        response = {"result": output["result"], "confidence": output["confidence"], "timings": output["timings"]}
+        if "image_base64" in output:
+            response["image_base64"] = output["image_base64"]
+        if "cache_stats" in output:
+            response["cache_hit"] = output.get("cache_hit", False)
+            response["cache_stats"] = output["cache_stats"]
+        self.stage_timer.observe("encode", time.perf_counter() - start)
+        return response
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="YOLOv11n LitServe / MCP server")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-batch-size", type=int, default=1,
+                        help="Largest number of queued requests stacked into one model call")
+    parser.add_argument("--batch-timeout", type=float, default=0.01,
+                        help="Seconds to wait for a batch to fill before running it")
+    parser.add_argument("--backend", default="auto", choices=BACKEND_CHOICES,
+                        help="Inference runtime; 'auto' picks the fastest exported model available")
+    parser.add_argument("--cache-size", type=int, default=256,
+                        help="Detection results kept for repeated frames (0 disables the cache)")
+    parser.add_argument("--cache-ttl", type=float, default=60.0, help="Seconds a cached result stays valid")
+    parser.add_argument("--cache-mode", default="exact", choices=CACHE_MODES,
+                        help="perceptual also reuses results for near-duplicate frames")
+    parser.add_argument("--cache-distance", type=int, default=4,
+                        help="Perceptual mode: largest hash distance (bits of 64) counted as a duplicate")
+    return parser.parse_args()
 
 # Package and publish the MCP tool
 if __name__ == "__main__":
+    args = parse_args()
     # Create the MCP tool with a name and description
     mcp = MCP(name="YoloV11n", description="YOLOv11n object detection MCP")
-    # Instantiate the API with the MCP tool
-    api = YoloV11n(mcp=mcp)
-    # Create and run the LitServer on the default port
-    server = ls.LitServer(api)
-    server.run(port=8000)
\ No newline at end of file
+    # Instantiate the API with the MCP tool and dynamic batching settings
+    api = YoloV11n(backend=args.backend, cache_size=args.cache_size, cache_ttl=args.cache_ttl,
+                   cache_mode=args.cache_mode, cache_distance=args.cache_distance, mcp=mcp,
+                   max_batch_size=args.max_batch_size, batch_timeout=args.batch_timeout)
+    # Create and run the LitServer on the default port; Prometheus metrics are served at /metrics
+    prune_metrics_dir()
+    server = ls.LitServer(api, middlewares=[(MetricsMiddleware, {"server": "yolo"})])
+    add_metrics_route(server)
+    server.run(port=args.port)
@@ -0,0 +1,83 @@
+"""
+Non-blocking spoken alerts for the live detection client
+
+DetectionDebouncer decides when a detection is real (seen in K of the last
+N frames, with a cooldown between alerts) and AlertWorker synthesizes and
+plays the alert on a background thread so the camera loop never waits.
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+
+ALERT_TEXT = "Object Detected! Picking up your clothes now."
+
+
+class DetectionDebouncer:
+    """Fires when a detection is present in at least k of the last n frames"""
+
+    def __init__(self, k=3, n=5, cooldown=10.0):
+        if not 1 <= k <= n:
+            raise ValueError("Need 1 <= k <= n")
+        self.k = k
+        self.cooldown = cooldown
+        self._window = deque(maxlen=n)
+        self._last_fired = None
+
+    def update(self, detected, now=None):
+        """Record one frame. Returns True when an alert should fire."""
+        now = time.monotonic() if now is None else now
+        self._window.append(bool(detected))
+        if sum(self._window) < self.k:
+            return False
+        if self._last_fired is not None and now - self._last_fired < self.cooldown:
+            return False
+        self._last_fired = now
+        # Start over so the same burst of frames cannot fire again after the cooldown
+        self._window.clear()
+        return True
+
+
+class AlertWorker:
+    """Runs TTS requests and playback on a daemon thread.
+
+    At most one alert waits behind the one being spoken; further triggers
+    while both slots are busy are dropped rather than queued.
+    """
+
+    def __init__(self, speak_fn):
+        self.speak_fn = speak_fn
+        self._queue = queue.Queue(maxsize=1)
+        self._thread = threading.Thread(target=self._run, name="alerts", daemon=True)
+        self.fired = 0
+        self.dropped = 0
+        self._thread.start()
+
+    def trigger(self, text=ALERT_TEXT):
+        """Queue an alert without blocking. Returns False if it was dropped."""
+        try:
+            self._queue.put_nowait(text)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _run(self):
+        while True:
+            text = self._queue.get()
+            if text is None:
+                break
+            try:
+                self.speak_fn(text)
+                self.fired += 1
+            except Exception as e:
+                # A failed alert must never take the detection loop down
+                print(f"❌ Alert failed: {e}")
+
+    def close(self, timeout=5.0):
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout=timeout)
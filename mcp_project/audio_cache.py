@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import threading
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so the same phrase with different line breaks shares an entry"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class AudioCache:
+    """Synthesized-audio cache keyed on (normalized text, voice, speed, lang).
+
+    Entries live in a bounded in-memory LRU tier. When disk_dir is set they are
+    also written there as .npz files, so they survive restarts and are shared by
+    every worker process pointed at the same directory.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024, disk_dir: str = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(text: str, voice: str, speed: float, lang: str) -> str:
+        raw = json.dumps([normalize_text(text), voice, round(float(speed), 4), lang])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        """Return (grapheme_sequence, phoneme_sequence, audio) or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return entry
+        entry = self._load_from_disk(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        self._remember(key, entry)
+        return entry
+
+    def put(self, key: str, gs: str, ps: str, audio: np.ndarray):
+        entry = (gs, ps, np.ascontiguousarray(audio, dtype=np.float32))
+        self._remember(key, entry)
+        if self.disk_dir:
+            self._save_to_disk(key, entry)
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+    def _remember(self, key, entry):
+        size = entry[2].nbytes
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[2].nbytes
+            self._entries[key] = entry
+            self._bytes += size
+            # Evict least recently used phrases until both bounds hold
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted[2].nbytes
+
+    def _path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.npz")
+
+    def _load_from_disk(self, key):
+        if not self.disk_dir or not os.path.exists(self._path(key)):
+            return None
+        try:
+            with np.load(self._path(key)) as data:
+                return str(data["gs"]), str(data["ps"]), data["audio"].astype(np.float32, copy=False)
+        except (OSError, KeyError, ValueError):
+            # A partial or corrupt file is treated as a miss and overwritten later
+            return None
+
+    def _save_to_disk(self, key, entry):
+        gs, ps, audio = entry
+        tmp_path = self._path(key) + f".{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                np.savez(f, gs=np.array(gs), ps=np.array(ps), audio=audio)
+            # Atomic rename so concurrent readers never see a half-written file
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            # Disk full or read-only: the phrase stays in memory and the synthesis still succeeds
+            print(f"⚠️  Could not write audio cache entry to {self.disk_dir}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
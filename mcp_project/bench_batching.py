@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Load benchmark for dynamic batching in the YoloV11n server
+
+Starts Yolov11nMCP.py once per max batch size, drives it with concurrent
+clients and reports throughput and p50/p99 latency for each setting.
+
+Usage: python bench_batching.py --batch-sizes 1 4 8 --concurrency 8 --duration 20
+"""
+
+import argparse
+import base64
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+import requests
+
+DEFAULT_IMAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "..", "live_detection_model", "test_images", "IMG_9972.jpg")
+
+
+def wait_for_server(base_url, timeout=120):
+    """Poll the LitServe health endpoint until the model has loaded"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return True
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.5)
+    return False
+
+
+def run_load(url, payload, concurrency, duration):
+    """Send requests from `concurrency` threads for `duration` seconds and collect latencies"""
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def worker():
+        nonlocal errors
+        session = requests.Session()
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            try:
+                ok = session.post(url, json=payload, timeout=30).status_code == 200
+            except requests.exceptions.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    return np.asarray(latencies), errors, wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--batch-timeout", type=float, default=0.01)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of load per batch size")
+    parser.add_argument("--image", default=DEFAULT_IMAGE)
+    parser.add_argument("--port", type=int, default=8010)
+    args = parser.parse_args()
+
+    with open(args.image, "rb") as f:
+        payload = {"encoded_image": base64.b64encode(f.read()).decode("utf-8"), "threshold": 0.5}
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    server_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Yolov11nMCP.py")
+    rows = []
+
+    for batch_size in args.batch_sizes:
+        print(f"🚀 Starting server with max_batch_size={batch_size}")
+        server = subprocess.Popen([sys.executable, server_script, "--port", str(args.port),
+                                   "--max-batch-size", str(batch_size),
+                                   "--batch-timeout", str(args.batch_timeout)])
+        try:
+            if not wait_for_server(base_url):
+                print("❌ Server did not become healthy")
+                continue
+            # Warm up so model initialization is not counted
+            run_load(f"{base_url}/predict", payload, 1, 2.0)
+            latencies, errors, wall = run_load(f"{base_url}/predict", payload, args.concurrency, args.duration)
+        finally:
+            server.terminate()
+            server.wait()
+
+        if len(latencies) == 0:
+            print("❌ No successful requests")
+            continue
+        rows.append((batch_size, len(latencies) / wall,
+                     np.percentile(latencies, 50) * 1000, np.percentile(latencies, 99) * 1000, errors))
+
+    print(f"\nconcurrency={args.concurrency} batch_timeout={args.batch_timeout}s")
+    print(f"{'batch':>6} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for batch_size, throughput, p50, p99, errors in rows:
+        print(f"{batch_size:>6} {throughput:>8.1f} {p50:>8.1f} {p99:>8.1f} {errors:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Measure achieved detection FPS against the number of in-flight requests
+
+Requires Yolov11nMCP.py running on port 8000 (start it with --max-batch-size
+> 1 to let concurrent frames share a model call). Compares the old
+one-connection-per-frame requests.post loop with the pooled sync and async
+clients at several in-flight limits.
+
+Usage: python bench_client_fps.py [--in-flight 1 2 4 8] [--frames 200]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+import cv2
+import requests
+
+from service_client import AsyncDetectionClient, DetectionClient, encode_frame
+
+DEFAULT_IMAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "..", "live_detection_model", "test_images", "IMG_9972.jpg")
+
+
+def unpooled_fps(url, frame, n_frames):
+    """The original loop: a fresh TCP connection and a blocking round trip per frame"""
+    start = time.perf_counter()
+    for _ in range(n_frames):
+        payload = {"encoded_image": encode_frame(frame), "threshold": 0.5}
+        requests.post(f"{url}/predict", json=payload, timeout=5).raise_for_status()
+    return n_frames / (time.perf_counter() - start)
+
+
+def pooled_fps(url, frame, n_frames, in_flight):
+    with DetectionClient(url, max_in_flight=in_flight) as client:
+        client.detect(frame)  # open the pooled connection before timing
+        start = time.perf_counter()
+        futures = [client.submit(frame) for _ in range(n_frames)]
+        for future in futures:
+            future.result()
+        return n_frames / (time.perf_counter() - start)
+
+
+async def async_fps(url, frame, n_frames, in_flight):
+    async with AsyncDetectionClient(url, max_in_flight=in_flight) as client:
+        await client.detect(frame)
+        start = time.perf_counter()
+        await asyncio.gather(*(client.detect(frame) for _ in range(n_frames)))
+        return n_frames / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--image", default=DEFAULT_IMAGE)
+    parser.add_argument("--width", type=int, default=640, help="Frames are resized to webcam size")
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--in-flight", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--no-async", action="store_true", help="Skip the httpx client")
+    args = parser.parse_args()
+
+    frame = cv2.resize(cv2.imread(args.image), (args.width, args.height))
+
+    print(f"{'client':<10} {'in-flight':>9} {'FPS':>8}")
+    print(f"{'unpooled':<10} {1:>9} {unpooled_fps(args.url, frame, args.frames):>8.1f}")
+    for in_flight in args.in_flight:
+        print(f"{'sync':<10} {in_flight:>9} {pooled_fps(args.url, frame, args.frames, in_flight):>8.1f}")
+        if not args.no_async:
+            fps = asyncio.run(async_fps(args.url, frame, args.frames, in_flight))
+            print(f"{'async':<10} {in_flight:>9} {fps:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Compare per-frame transport cost: base64 JPEG vs shared memory
+
+Times what each transport adds around the model for one frame: on the client
+side building the JSON body, on the server side turning that body back into
+a numpy frame (JPEG: base64 + imdecode; shm: attach once, then a view). Runs
+offline without a server. With --url it also measures end-to-end FPS against
+a running Yolov11nMCP.py on this machine.
+
+Usage: python bench_frame_transport.py [--width 1280 --height 720] [--frames 200] [--url http://localhost:8000]
+"""
+
+import argparse
+import base64
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+from service_client import DetectionClient, encode_frame
+from shm_transport import SharedFrameReader, SharedFrameRing
+
+DEFAULT_IMAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "..", "live_detection_model", "test_images", "IMG_9972.jpg")
+
+
+def jpeg_roundtrip(frame):
+    body = json.dumps({"encoded_image": encode_frame(frame), "threshold": 0.5})
+    sent = time.perf_counter()
+    request = json.loads(body)
+    data = np.frombuffer(base64.b64decode(request["encoded_image"], validate=True), dtype=np.uint8)
+    decoded = cv2.imdecode(data, cv2.IMREAD_COLOR)
+    return sent, decoded, len(body)
+
+
+def shm_roundtrip(frame, ring, reader):
+    slot = ring.acquire()
+    offset, shape, sequence = ring.write(slot, frame)
+    body = json.dumps({"shm_name": ring.name, "shm_offset": offset, "shm_seq": sequence, "frame_shape": shape,
+                       "threshold": 0.5})
+    sent = time.perf_counter()
+    request = json.loads(body)
+    decoded = reader.view(request["shm_name"], request["shm_offset"], request["frame_shape"])
+    assert reader.sequence(request["shm_name"], request["shm_offset"]) == request["shm_seq"]
+    ring.release(slot)
+    return sent, decoded, len(body)
+
+
+def measure(step, n_frames):
+    client, server = [], []
+    for _ in range(n_frames):
+        start = time.perf_counter()
+        sent, _, size = step()
+        done = time.perf_counter()
+        client.append((sent - start) * 1000)
+        server.append((done - sent) * 1000)
+    return float(np.median(client)), float(np.median(server)), size
+
+
+def end_to_end_fps(url, frame, n_frames, transport, in_flight):
+    with DetectionClient(url, max_in_flight=in_flight, transport=transport) as client:
+        client.detect(frame)  # open the connection and map the block before timing
+        start = time.perf_counter()
+        futures = [client.submit(frame) for _ in range(n_frames)]
+        for future in futures:
+            future.result()
+        return n_frames / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image", default=DEFAULT_IMAGE)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--url", default=None, help="Also measure end-to-end FPS against this server")
+    parser.add_argument("--in-flight", type=int, default=2)
+    args = parser.parse_args()
+
+    image = cv2.imread(args.image)
+    if image is None:
+        # Fall back to noise, which is the worst case for JPEG
+        image = np.random.default_rng(0).integers(0, 256, (args.height, args.width, 3), dtype=np.uint8)
+    frame = cv2.resize(image, (args.width, args.height))
+
+    with SharedFrameRing(args.in_flight, frame.nbytes) as ring:
+        reader = SharedFrameReader()
+        print(f"{args.width}x{args.height} frame, median over {args.frames} frames")
+        print(f"{'transport':<10} {'client ms':>10} {'server ms':>10} {'body bytes':>11}")
+        for name, step in (("jpeg", lambda: jpeg_roundtrip(frame)),
+                           ("shm", lambda: shm_roundtrip(frame, ring, reader))):
+            client_ms, server_ms, size = measure(step, args.frames)
+            print(f"{name:<10} {client_ms:>10.3f} {server_ms:>10.3f} {size:>11}")
+        reader.close()
+
+    if args.url:
+        print(f"\n{'transport':<10} {'in-flight':>9} {'FPS':>8}")
+        for transport in ("jpeg", "shm"):
+            fps = end_to_end_fps(args.url, frame, args.frames, transport, args.in_flight)
+            print(f"{transport:<10} {args.in_flight:>9} {fps:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
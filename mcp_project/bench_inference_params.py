@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Measure how the YOLO server's filtering controls change latency and response size
+
+Requires Yolov11nMCP.py running on port 8000. Sends the same frame with each
+setting below and reports the round trip, the server-side inference and
+postprocess time (from the response's timings), the boxes returned and the
+response size. A low threshold shows the cost of shipping every weak box;
+max_det and a smaller imgsz show what trimming buys.
+
+Usage: python bench_inference_params.py [--image photo.jpg] [--requests 50]
+"""
+
+import argparse
+import os
+import time
+
+import cv2
+import numpy as np
+
+from service_client import encode_frame, make_session
+
+DEFAULT_IMAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "..", "live_detection_model", "test_images", "IMG_9972.jpg")
+
+SETTINGS = (
+    ("conf 0.01", {"threshold": 0.01}),
+    ("conf 0.25", {"threshold": 0.25}),
+    ("conf 0.5", {"threshold": 0.5}),
+    ("conf 0.01 max_det 10", {"threshold": 0.01, "max_det": 10}),
+    ("conf 0.5 iou 0.45", {"threshold": 0.5, "iou": 0.45}),
+    ("conf 0.5 imgsz 480", {"threshold": 0.5, "imgsz": 480}),
+    ("conf 0.5 imgsz 320", {"threshold": 0.5, "imgsz": 320}),
+)
+
+
+def run_setting(session, url, encoded, options, n_requests):
+    payload = {"encoded_image": encoded, **options}
+    session.post(url, json=payload, timeout=30).raise_for_status()  # warm up this input size
+    latency, inference, postprocess = [], [], []
+    for _ in range(n_requests):
+        start = time.perf_counter()
+        response = session.post(url, json=payload, timeout=30)
+        latency.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+        body = response.json()
+        inference.append(body["timings"]["inference"])
+        postprocess.append(body["timings"]["postprocess"])
+    return {
+        "latency": float(np.median(latency)),
+        "inference": float(np.median(inference)),
+        "postprocess": float(np.median(postprocess)),
+        "boxes": len(body["result"]),
+        "bytes": len(response.content),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--image", default=DEFAULT_IMAGE)
+    parser.add_argument("--requests", type=int, default=50, help="Requests per setting")
+    args = parser.parse_args()
+
+    image = cv2.imread(args.image)
+    if image is None:
+        print(f"❌ Could not read image: {args.image}")
+        return
+    encoded = encode_frame(image)
+    session = make_session(pool_size=1)
+
+    print(f"{'setting':<22} {'p50 ms':>8} {'infer ms':>9} {'post ms':>8} {'boxes':>6} {'bytes':>7}")
+    for name, options in SETTINGS:
+        stats = run_setting(session, f"{args.url}/predict", encoded, options, args.requests)
+        print(f"{name:<22} {stats['latency']:>8.1f} {stats['inference']:>9.1f} {stats['postprocess']:>8.2f} "
+              f"{stats['boxes']:>6} {stats['bytes']:>7}")
+    session.close()
+
+
+if __name__ == "__main__":
+    main()
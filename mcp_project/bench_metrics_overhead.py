@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Measure what the Prometheus instrumentation adds to each request
+
+Replays the metric updates one YOLO request makes (stage histograms, batch
+size, cache counter, and the middleware's latency histogram, request counter
+and in-flight gauge) in multiprocess mode and compares their cost with a
+request's latency. That is taken from --url when a server is running, otherwise
+from --request-ms. Also times a /metrics scrape.
+
+Usage: python bench_metrics_overhead.py [--request-ms 25] [--url http://localhost:8000] [--requests 20000]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+import metrics
+from metrics import IN_FLIGHT, REQUEST_SECONDS, REQUESTS, StageTimer, metrics_endpoint
+from service_client import encode_frame, make_session
+
+STAGES = ("decode", "cache", "preprocess", "postprocess", "encode")
+
+
+def instrument_request(timer, in_flight, timings):
+    """The metric calls made for one request, in the order the server makes them"""
+    in_flight.inc()
+    timer.cache(False)
+    timer.observe("inference", 0.012)
+    timer.batch(1)
+    timer.observe_ms(timings, skip=("inference",))
+    timer.observe("encode", 0.0002)
+    in_flight.dec()
+    REQUEST_SECONDS.labels("bench", "/predict").observe(0.02)
+    REQUESTS.labels("bench", "/predict", "200").inc()
+
+
+def measured_latency_ms(url, n_requests):
+    frame = np.random.default_rng(0).integers(0, 256, (480, 640, 3), dtype=np.uint8)
+    payload = {"encoded_image": encode_frame(frame), "threshold": 0.5}
+    session = make_session(pool_size=1)
+    session.post(f"{url}/predict", json=payload, timeout=30).raise_for_status()
+    latency = []
+    for _ in range(n_requests):
+        start = time.perf_counter()
+        session.post(f"{url}/predict", json=payload, timeout=30).raise_for_status()
+        latency.append((time.perf_counter() - start) * 1000)
+    session.close()
+    return float(np.median(latency))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000, help="Simulated requests to instrument")
+    parser.add_argument("--request-ms", type=float, default=25.0, help="Request latency to compare against")
+    parser.add_argument("--url", default=None, help="Measure request latency against this server instead")
+    args = parser.parse_args()
+
+    metrics.prune_metrics_dir()
+    timer = StageTimer("bench")
+    in_flight = IN_FLIGHT.labels("bench")
+    timings = {stage: 1.0 for stage in STAGES}
+    instrument_request(timer, in_flight, timings)  # create the per-process sample files
+
+    start = time.perf_counter()
+    for _ in range(args.requests):
+        instrument_request(timer, in_flight, timings)
+    per_request_us = (time.perf_counter() - start) / args.requests * 1e6
+
+    start = time.perf_counter()
+    body = metrics_endpoint().body
+    scrape_ms = (time.perf_counter() - start) * 1000
+
+    request_ms = measured_latency_ms(args.url, 100) if args.url else args.request_ms
+    overhead = per_request_us / (request_ms * 1000) * 100
+    print(f"Instrumentation: {per_request_us:.1f} µs/request over {args.requests} requests")
+    print(f"Request latency: {request_ms:.1f} ms ({'measured' if args.url else 'assumed'})")
+    print(f"{'✅' if overhead < 1.0 else '⚠️'} Overhead: {overhead:.3f}% of request time")
+    print(f"/metrics scrape: {scrape_ms:.1f} ms, {len(body) / 1024:.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Compare YOLO server preprocessing: the old PIL stretch path vs the OpenCV letterbox path
+
+Both start from the encoded image bytes a request carries and end with the
+640x640 3-channel array handed to the model. Runs offline, no server needed.
+
+Usage: python bench_preprocess.py [--image photo.jpg] [--width 1920 --height 1080] [--runs 100]
+"""
+
+import argparse
+import os
+import time
+from io import BytesIO
+
+import cv2
+import numpy as np
+from PIL import Image, ImageOps
+
+DEFAULT_IMAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "..", "live_detection_model", "test_images", "IMG_9972.jpg")
+INPUT_SIZE = 640
+PAD_VALUE = 114
+
+
+def pil_stretch(data):
+    """The original preprocess_for_inference"""
+    img = ImageOps.exif_transpose(Image.open(BytesIO(data)))
+    img = img.resize((INPUT_SIZE, INPUT_SIZE), Image.BILINEAR).convert("L")
+    return cv2.cvtColor(np.array(img), cv2.COLOR_GRAY2BGR)
+
+
+def cv2_letterbox(data, out):
+    """Same steps as YoloV11n.decode_grayscale + letterbox"""
+    gray = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+    height, width = gray.shape
+    scale = min(INPUT_SIZE / height, INPUT_SIZE / width)
+    new_w, new_h = max(1, round(width * scale)), max(1, round(height * scale))
+    pad_x, pad_y = (INPUT_SIZE - new_w) // 2, (INPUT_SIZE - new_h) // 2
+    out.fill(PAD_VALUE)
+    cv2.resize(gray, (new_w, new_h), dst=out[pad_y:pad_y + new_h, pad_x:pad_x + new_w],
+               interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR)
+    return np.broadcast_to(out[..., None], out.shape + (3,))
+
+
+def measure(fn, runs):
+    fn()
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings)), float(np.percentile(timings, 95))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image", default=DEFAULT_IMAGE)
+    parser.add_argument("--width", type=int, default=1280, help="Image is resized to this size before encoding")
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--runs", type=int, default=100)
+    args = parser.parse_args()
+
+    image = cv2.imread(args.image)
+    if image is None:
+        image = np.random.default_rng(0).integers(0, 256, (args.height, args.width, 3), dtype=np.uint8)
+    ok, encoded = cv2.imencode(".jpg", cv2.resize(image, (args.width, args.height)))
+    data = encoded.tobytes()
+    buffer = np.full((INPUT_SIZE, INPUT_SIZE), PAD_VALUE, dtype=np.uint8)
+
+    print(f"{args.width}x{args.height} JPEG ({len(data) / 1024:.0f} KB), {args.runs} runs")
+    print(f"{'path':<16} {'p50 ms':>8} {'p95 ms':>8}")
+    for name, fn in (("PIL stretch", lambda: pil_stretch(data)),
+                     ("cv2 letterbox", lambda: cv2_letterbox(data, buffer))):
+        p50, p95 = measure(fn, args.runs)
+        print(f"{name:<16} {p50:>8.2f} {p95:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
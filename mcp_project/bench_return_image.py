@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Benchmark the per-request cost of returning the annotated image
+
+Runs YoloV11n.predict in-process with return_image off and on and reports
+the mean latency of each mode and the difference. Requests are decoded
+outside the timed section and the result cache is off, so every call runs
+the model.
+
+Usage: python bench_return_image.py [--image path] [--iterations 50]
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from Yolov11nMCP import AnalysisRequest, YoloV11n
+
+DEFAULT_IMAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "..", "live_detection_model", "test_images", "IMG_9972.jpg")
+
+
+def time_predict(api, request, iterations):
+    latencies = []
+    for _ in range(iterations):
+        # predict fills in per-request timings, so every call gets freshly decoded inputs
+        inputs = api.decode_request(request)
+        start = time.perf_counter()
+        api.predict(inputs)
+        latencies.append(time.perf_counter() - start)
+    return np.asarray(latencies) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image", default=DEFAULT_IMAGE)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    api = YoloV11n(cache_size=0)
+    api.setup("cpu")
+
+    boxes_only = AnalysisRequest(data_path=args.image, threshold=0.5, return_image=False)
+    with_render = AnalysisRequest(data_path=args.image, threshold=0.5, return_image=True)
+    # Warm up the model so the first call's initialization is not counted
+    api.predict(api.decode_request(boxes_only))
+
+    without_image = time_predict(api, boxes_only, args.iterations)
+    with_image = time_predict(api, with_render, args.iterations)
+
+    print(f"{'mode':<16} {'mean ms':>8} {'p50 ms':>8}")
+    print(f"{'boxes only':<16} {without_image.mean():>8.2f} {np.percentile(without_image, 50):>8.2f}")
+    print(f"{'boxes + image':<16} {with_image.mean():>8.2f} {np.percentile(with_image, 50):>8.2f}")
+    print(f"\n💾 Saved per request: {with_image.mean() - without_image.mean():.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
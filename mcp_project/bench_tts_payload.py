@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Compare payload size and round-trip time of the TTS response formats
+
+Requires tts_mcp.py running on port 8001. Each mode is timed from request
+to a decoded float32 numpy array on the client.
+
+Usage: python bench_tts_payload.py [--iterations 10]
+"""
+
+import argparse
+import base64
+import time
+
+import numpy as np
+import requests
+
+from service_client import decode_audio
+
+MODES = [
+    ("json list", {"response_format": "json"}),
+    ("base64 wav", {"response_format": "base64", "audio_format": "wav"}),
+    ("base64 int16", {"response_format": "base64", "audio_format": "int16"}),
+    ("binary float32", {"response_format": "binary", "audio_format": "float32"}),
+    ("binary int16", {"response_format": "binary", "audio_format": "int16"}),
+    ("binary wav", {"response_format": "binary", "audio_format": "wav"}),
+]
+
+
+def fetch_audio(session, url, payload):
+    response = session.post(url, json=payload, timeout=60)
+    response.raise_for_status()
+    if payload["response_format"] == "binary":
+        return len(response.content), decode_audio(response.content, payload["audio_format"])
+    result = response.json()
+    if payload["response_format"] == "json":
+        return len(response.content), np.array(result["audio_data"], dtype=np.float32)
+    return len(response.content), decode_audio(base64.b64decode(result["audio_base64"]), payload["audio_format"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8001/predict")
+    parser.add_argument("--text", default="Object Detected! Picking up your clothes now.")
+    parser.add_argument("--voice", default="af_heart")
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args()
+
+    session = requests.Session()
+    print(f"{'mode':<16} {'bytes':>10} {'mean ms':>9} {'p50 ms':>9} {'samples':>9}")
+    for name, options in MODES:
+        payload = {"text": args.text, "voice": args.voice, "speed": 1.0, **options}
+        fetch_audio(session, args.url, payload)  # warm up
+        latencies = []
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            size, audio = fetch_audio(session, args.url, payload)
+            latencies.append((time.perf_counter() - start) * 1000)
+        latencies = np.asarray(latencies)
+        print(f"{name:<16} {size:>10} {latencies.mean():>9.1f} {np.percentile(latencies, 50):>9.1f} {len(audio):>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark TTS speed control: latency and peak memory per speed and text length
+
+Compares the old nearest-index decimation, the WSOLA fallback and (when
+Kokoro is installed) Kokoro's native speed argument. Decimation and WSOLA
+run on synthetic audio of the same length as the synthesized clip.
+
+Usage: python bench_tts_speed.py [--speeds 0.75 1.25 1.5 2.0] [--no-kokoro]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from time_stretch import wsola
+
+SAMPLE_RATE = 24000
+TEXTS = {
+    "short": "Object Detected!",
+    "alert": "Object Detected! Picking up your clothes now.",
+    "long": " ".join(["Object Detected! Picking up your clothes now. "
+                      "Please keep the area clear while the robot is moving."] * 8),
+}
+# Rough clip length per text when Kokoro is not installed (seconds)
+SYNTHETIC_SECONDS = {"short": 1.2, "alert": 3.0, "long": 40.0}
+
+
+def decimate(audio, speed):
+    """The original implementation: nearest-index decimation over np.linspace"""
+    indices = np.linspace(0, len(audio) - 1, int(len(audio) / speed), dtype=int)
+    return audio[indices]
+
+
+def measure(fn, *args):
+    # Time and memory are taken in separate runs because tracemalloc slows allocation down
+    start = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed * 1000, peak / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--speeds", type=float, nargs="+", default=[0.75, 1.25, 1.5, 2.0])
+    parser.add_argument("--voice", default="af_heart")
+    parser.add_argument("--no-kokoro", action="store_true", help="Only benchmark the numpy paths")
+    args = parser.parse_args()
+
+    pipeline = None
+    if not args.no_kokoro:
+        try:
+            from kokoro import KPipeline
+            pipeline = KPipeline(lang_code="a")
+            list(pipeline("Warm up.", voice=args.voice))
+        except ImportError:
+            print("⚠️  kokoro not installed, skipping native speed")
+
+    rng = np.random.default_rng(0)
+    print(f"{'text':<6} {'speed':>5} {'method':<10} {'ms':>9} {'peak MB':>8}")
+    for name, text in TEXTS.items():
+        if pipeline is not None:
+            audio = np.concatenate([np.asarray(a, dtype=np.float32) for _, _, a in pipeline(text, voice=args.voice)])
+        else:
+            audio = rng.standard_normal(int(SYNTHETIC_SECONDS[name] * SAMPLE_RATE)).astype(np.float32) * 0.1
+        for speed in args.speeds:
+            rows = [
+                ("decimate", *measure(decimate, audio, speed)),
+                ("wsola", *measure(wsola, audio, speed, SAMPLE_RATE)),
+            ]
+            if pipeline is not None:
+                # Native speed includes synthesis itself, so also show the 1.0x synthesis baseline
+                rows.append(("kokoro", *measure(lambda: list(pipeline(text, voice=args.voice, speed=speed)))))
+            for method, ms, peak in rows:
+                print(f"{name:<6} {speed:>5.2f} {method:<10} {ms:>9.2f} {peak:>8.2f}")
+        if pipeline is not None:
+            ms, peak = measure(lambda: list(pipeline(text, voice=args.voice)))
+            print(f"{name:<6} {1.0:>5.2f} {'kokoro':<10} {ms:>9.2f} {peak:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
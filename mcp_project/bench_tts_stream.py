@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Measure time-to-first-audio of streaming vs whole-clip TTS
+
+Requires tts_mcp.py running on port 8001. For each text length, /stream is
+timed to its first decoded chunk and /predict (binary int16) to the full clip.
+
+Usage: python bench_tts_stream.py [--iterations 5]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import requests
+
+from service_client import TtsClient, decode_audio
+
+TEXTS = {
+    "short": "Object Detected!",
+    "alert": "Object Detected! Picking up your clothes now.",
+    "long": " ".join(["Object Detected! Picking up your clothes now. "
+                      "Please keep the area clear while the robot is moving."] * 4),
+}
+
+
+def time_to_first_chunk(client, text, voice):
+    start = time.perf_counter()
+    first = None
+    samples = 0
+    for chunk in client.stream(text, voice=voice):
+        if first is None:
+            first = time.perf_counter() - start
+        samples += len(chunk)
+    return first, time.perf_counter() - start, samples
+
+
+def time_whole_clip(session, base_url, text, voice):
+    payload = {"text": text, "voice": voice, "speed": 1.0, "response_format": "binary", "audio_format": "int16"}
+    start = time.perf_counter()
+    response = session.post(f"{base_url}/predict", json=payload, timeout=120)
+    response.raise_for_status()
+    samples = len(decode_audio(response.content, "int16"))
+    elapsed = time.perf_counter() - start
+    return elapsed, samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8001")
+    parser.add_argument("--voice", default="af_heart")
+    parser.add_argument("--iterations", type=int, default=5)
+    args = parser.parse_args()
+
+    session = requests.Session()
+    client = TtsClient(args.url)
+    # Warm up both endpoints so voice loading is not counted
+    time_whole_clip(session, args.url, TEXTS["short"], args.voice)
+    time_to_first_chunk(client, TEXTS["short"], args.voice)
+
+    print(f"{'text':<8} {'stream TTFA ms':>15} {'stream total ms':>16} {'predict ms':>11} {'audio s':>8}")
+    for name, text in TEXTS.items():
+        first, total, whole = [], [], []
+        for _ in range(args.iterations):
+            ttfa, stream_total, samples = time_to_first_chunk(client, text, args.voice)
+            first.append(ttfa * 1000)
+            total.append(stream_total * 1000)
+            whole.append(time_whole_clip(session, args.url, text, args.voice)[0] * 1000)
+        print(f"{name:<8} {np.median(first):>15.0f} {np.median(total):>16.0f} "
+              f"{np.median(whole):>11.0f} {samples / 24000:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
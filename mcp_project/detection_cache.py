@@ -0,0 +1,105 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+CACHE_MODES = ("exact", "perceptual")
+
+
+def dhash(gray: np.ndarray) -> int:
+    """64-bit difference hash: which of each pair of neighbouring pixels is brighter on a 9x8 thumbnail"""
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+class DetectionCache:
+    """Detection results keyed on the decoded image and the inference parameters.
+
+    In "exact" mode the key is a blake2b digest of the decoded pixels, so only
+    byte-identical frames hit. In "perceptual" mode it is a difference hash and
+    a lookup also accepts a cached frame of the same size and parameters whose
+    hash differs in at most max_distance bits, which catches re-encoded or
+    slightly noisy copies of a static scene. Entries expire after ttl seconds
+    and the least recently used ones are evicted beyond max_entries.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 60.0, mode: str = "exact", max_distance: int = 4):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"mode must be one of {CACHE_MODES}")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.mode = mode
+        self.max_distance = max_distance
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    def make_key(self, gray: np.ndarray, params: tuple):
+        if self.mode == "exact":
+            digest = hashlib.blake2b(np.ascontiguousarray(gray).data, digest_size=16).hexdigest()
+        else:
+            digest = dhash(gray)
+        return params, gray.shape, digest
+
+    def get(self, key):
+        """Return the cached output for key (or a near-duplicate of it), or None"""
+        now = time.monotonic()
+        with self._lock:
+            found = self._lookup(key, now)
+            if found is None and self.mode == "perceptual":
+                found = self._nearest(key, now)
+                if found is not None:
+                    self.near_hits += 1
+            if found is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(found)
+            self.hits += 1
+            return self._entries[found][1]
+
+    def put(self, key, output: dict):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic() + self.ttl, output)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
+
+    def _lookup(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < now:
+            del self._entries[key]
+            self.expired += 1
+            return None
+        return key
+
+    def _nearest(self, key, now):
+        params, shape, digest = key
+        best, best_distance = None, self.max_distance + 1
+        for candidate, (expires, _) in self._entries.items():
+            if expires < now or candidate[0] != params or candidate[1] != shape:
+                continue
+            distance = bin(candidate[2] ^ digest).count("1")
+            if distance < best_distance:
+                best, best_distance = candidate, distance
+        return best
@@ -0,0 +1,141 @@
+"""
+Prometheus metrics shared by the YOLO and TTS servers
+
+LitServe runs the LitAPI in worker processes and the HTTP front end in
+others, so prometheus_client runs in multiprocess mode: every process writes
+its samples to files in PROMETHEUS_MULTIPROC_DIR and GET /metrics merges
+them. Import this module before anything else imports prometheus_client.
+
+Stage histograms are fed by the servers themselves (decode, preprocess,
+inference, encode, ...); request latency, counts and the number of requests
+waiting for an answer come from an ASGI middleware on the front end.
+"""
+
+import os
+import tempfile
+import time
+
+# prometheus_client picks multiprocess mode when it is imported, and spawned
+# workers inherit the directory through the environment
+if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="mcp_metrics_")
+
+from fastapi import Response
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+# From sub-millisecond cache hits up to multi-second speech synthesis
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+STAGE_SECONDS = Histogram("mcp_stage_seconds", "Time spent in one stage of a request",
+                          ["server", "stage"], buckets=STAGE_BUCKETS)
+REQUEST_SECONDS = Histogram("mcp_request_seconds", "HTTP request latency, including time queued for a worker",
+                            ["server", "path"], buckets=STAGE_BUCKETS)
+REQUESTS = Counter("mcp_requests_total", "HTTP requests answered", ["server", "path", "status"])
+IN_FLIGHT = Gauge("mcp_requests_in_flight", "Requests received and not answered yet (queue depth)",
+                  ["server"], multiprocess_mode="livesum")
+BATCH_SIZE = Histogram("mcp_batch_size", "Requests per model call", ["server"],
+                       buckets=(1, 2, 4, 8, 16, 32, 64))
+CACHE_LOOKUPS = Counter("mcp_cache_lookups_total", "Result cache lookups", ["server", "result"])
+MODEL_LOAD_SECONDS = Gauge("mcp_model_load_seconds", "Time taken to load and warm up the model",
+                           ["server"], multiprocess_mode="max")
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def prune_metrics_dir():
+    """Drop sample files left behind by processes that have exited
+
+    The directory may be shared with the other server (or supplied by the user),
+    so only *.db files of dead processes are removed and the directory is kept.
+    """
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    os.makedirs(path, exist_ok=True)
+    for name in os.listdir(path):
+        # prometheus_client names its files <kind>_<pid>.db
+        stem, ext = os.path.splitext(name)
+        pid = stem.rpartition("_")[2]
+        if ext == ".db" and pid.isdigit() and not _pid_alive(int(pid)):
+            try:
+                os.remove(os.path.join(path, name))
+            except FileNotFoundError:
+                pass
+
+
+class StageTimer:
+    """Pre-bound stage histograms for one server, so observing costs no label lookup"""
+
+    def __init__(self, server: str):
+        self.server = server
+        self._stages = {}
+
+    def observe(self, stage: str, seconds: float):
+        histogram = self._stages.get(stage)
+        if histogram is None:
+            histogram = self._stages[stage] = STAGE_SECONDS.labels(self.server, stage)
+        histogram.observe(seconds)
+
+    def observe_ms(self, timings: dict, skip=()):
+        for stage, ms in timings.items():
+            if stage not in skip:
+                self.observe(stage, ms / 1000)
+
+    def batch(self, size: int):
+        BATCH_SIZE.labels(self.server).observe(size)
+
+    def cache(self, hit: bool):
+        CACHE_LOOKUPS.labels(self.server, "hit" if hit else "miss").inc()
+
+    def model_loaded(self, seconds: float):
+        MODEL_LOAD_SECONDS.labels(self.server).set(seconds)
+
+
+class MetricsMiddleware:
+    """ASGI middleware counting requests and timing them end to end"""
+
+    def __init__(self, app, server: str):
+        self.app = app
+        self.server = server
+        self.in_flight = IN_FLIGHT.labels(server)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.in_flight.dec()
+            # Unknown paths share one label so scanners cannot blow up the series count
+            path = scope["path"] if status != 404 else "other"
+            REQUEST_SECONDS.labels(self.server, path).observe(time.perf_counter() - start)
+            REQUESTS.labels(self.server, path, str(status)).inc()
+
+
+def metrics_endpoint():
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return Response(content=generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+def add_metrics_route(server):
+    """Serve the merged samples of every process at GET /metrics on a LitServer"""
+    server.app.add_api_route("/metrics", metrics_endpoint, methods=["GET"], include_in_schema=False)
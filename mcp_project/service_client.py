@@ -0,0 +1,284 @@
+"""
+Reusable clients for the YOLO detection (port 8000) and Kokoro TTS (port 8001) servers
+
+Sync clients keep a pooled requests.Session with keep-alive connections and
+retries; async clients do the same with httpx.AsyncClient. Both bound the
+number of requests in flight so a camera loop can send frame N+1 while
+frame N is still being processed. A DetectionClient talking to a server on
+the same machine can pass frames through shared memory (transport="shm")
+instead of JPEG-encoding them.
+"""
+
+import asyncio
+import base64
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import cv2
+import numpy as np
+import requests
+import soundfile as sf
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from shm_transport import SharedFrameRing
+
+DETECTION_URL = "http://localhost:8000"
+TTS_URL = "http://localhost:8001"
+
+# Retried on connection errors and these statuses (server restarting / overloaded)
+RETRY_STATUSES = (502, 503, 504)
+
+# How DetectionClient hands frames to the server
+TRANSPORTS = ("jpeg", "shm")
+
+
+def encode_frame(frame, jpeg_quality=90):
+    """JPEG-encode a BGR frame in memory for the encoded_image field"""
+    ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality])
+    if not ok:
+        raise ValueError("Failed to encode frame")
+    return base64.b64encode(encoded.tobytes()).decode("utf-8")
+
+
+def decode_audio(content, audio_format):
+    """Turn WAV or raw PCM bytes from the TTS server into a float32 numpy array"""
+    if audio_format == "wav":
+        audio, _ = sf.read(BytesIO(content), dtype="float32")
+        return audio
+    if audio_format == "int16":
+        return np.frombuffer(content, dtype="<i2").astype(np.float32) / 32767.0
+    return np.frombuffer(content, dtype="<f4")
+
+
+def make_session(pool_size=4, retries=2, backoff=0.1):
+    """A requests.Session whose connections are kept alive and reused across calls"""
+    retry = Retry(total=retries, connect=retries, read=retries, backoff_factor=backoff,
+                  status_forcelist=RETRY_STATUSES, allowed_methods=frozenset({"GET", "POST"}))
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class DetectionClient:
+    """Pooled client for the YOLO server with a bounded number of in-flight requests
+
+    transport="jpeg" sends each frame as a base64 JPEG. transport="shm" copies
+    raw frames into a shared-memory ring with one slot per in-flight request
+    and sends only the slot location and its sequence number; it only works
+    when the server runs on the same machine.
+    """
+
+    def __init__(self, base_url=DETECTION_URL, timeout=5.0, retries=2, max_in_flight=2, jpeg_quality=90,
+                 transport="jpeg"):
+        if transport not in TRANSPORTS:
+            raise ValueError(f"transport must be one of {TRANSPORTS}")
+        self.url = f"{base_url}/predict"
+        self.timeout = timeout
+        self.jpeg_quality = jpeg_quality
+        self.max_in_flight = max_in_flight
+        self.transport = transport
+        self.session = make_session(pool_size=max_in_flight, retries=retries)
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="detect")
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        # Created on the first frame, sized to it
+        self.frames = None
+        self._frames_lock = threading.Lock()
+
+    def _frame_ring(self, frame):
+        with self._frames_lock:
+            if self.frames is None:
+                self.frames = SharedFrameRing(self.max_in_flight, frame.nbytes)
+            return self.frames
+
+    def build_payload(self, frame, threshold=0.5, slot=None, **options):
+        if slot is None:
+            return {"encoded_image": encode_frame(frame, self.jpeg_quality), "threshold": threshold, **options}
+        offset, shape, sequence = self.frames.write(slot, frame)
+        return {"shm_name": self.frames.name, "shm_offset": offset, "shm_seq": sequence, "frame_shape": shape,
+                "threshold": threshold, **options}
+
+    def prepare(self, frame, threshold=0.5, **options):
+        """Encode or copy the frame out of the caller's buffer. Returns (payload, slot) for send()."""
+        if self.transport == "jpeg":
+            return self.build_payload(frame, threshold, **options), None
+        frames = self._frame_ring(frame)
+        slot = frames.acquire()
+        try:
+            return self.build_payload(frame, threshold, slot=slot, **options), slot
+        except BaseException:
+            frames.release(slot)
+            raise
+
+    def send(self, payload, slot=None):
+        """POST a prepared payload and hand its shared-memory slot back afterwards"""
+        try:
+            # After a timeout the server may still hold an older request for this slot;
+            # the sequence number makes it reject that request once the slot is rewritten
+            return self._post(payload)
+        finally:
+            if slot is not None:
+                self.frames.release(slot)
+
+    def detect(self, frame, threshold=0.5, **options):
+        """Send one frame and wait for its detections"""
+        return self.send(*self.prepare(frame, threshold, **options))
+
+    def _post(self, payload):
+        response = self.session.post(self.url, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def has_capacity(self):
+        """True if submit() would not block"""
+        if self._slots.acquire(blocking=False):
+            self._slots.release()
+            return True
+        return False
+
+    def submit(self, frame, threshold=0.5, **options):
+        """Send a frame in the background. Blocks only when max_in_flight requests are pending.
+
+        The frame is JPEG-encoded or copied into shared memory before this returns,
+        so the caller may reuse its buffer right away.
+        """
+        self._slots.acquire()
+        try:
+            payload, slot = self.prepare(frame, threshold, **options)
+        except BaseException:
+            self._slots.release()
+            raise
+        future = self._executor.submit(self.send, payload, slot)
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.session.close()
+        if self.frames is not None:
+            self.frames.close()
+            self.frames = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TtsClient:
+    """Pooled client for the TTS server using compact binary audio"""
+
+    def __init__(self, base_url=TTS_URL, timeout=60.0, retries=2):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.session = make_session(pool_size=2, retries=retries)
+
+    def synthesize(self, text, voice="af_heart", speed=1.0, audio_format="wav"):
+        """Return (audio, sample_rate, headers) for the whole clip"""
+        payload = {"text": text, "voice": voice, "speed": speed,
+                   "response_format": "binary", "audio_format": audio_format}
+        response = self.session.post(f"{self.base_url}/predict", json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        if response.headers.get("content-type", "").startswith("application/json"):
+            # Synthesis errors always come back as JSON
+            raise RuntimeError(response.json().get("error") or "unexpected JSON response")
+        audio = decode_audio(response.content, response.headers["X-Audio-Format"])
+        return audio, int(response.headers["X-Sample-Rate"]), response.headers
+
+    def stream(self, text, voice="af_heart", speed=1.0, audio_format="int16"):
+        """Yield float32 audio chunks as soon as each segment arrives"""
+        payload = {"text": text, "voice": voice, "speed": speed, "audio_format": audio_format}
+        with self.session.post(f"{self.base_url}/stream", json=payload, stream=True,
+                               timeout=self.timeout) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise RuntimeError(chunk["error"])
+                yield decode_audio(base64.b64decode(chunk["audio_base64"]), chunk["audio_format"])
+
+    def close(self):
+        self.session.close()
+
+
+async def _post_with_retries(client, url, payload, retries, backoff):
+    import httpx
+
+    for attempt in range(retries + 1):
+        try:
+            response = await client.post(url, json=payload)
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                response.raise_for_status()
+                return response
+        except (httpx.TransportError, httpx.TimeoutException):
+            if attempt == retries:
+                raise
+        await asyncio.sleep(backoff * (2 ** attempt))
+
+
+class AsyncDetectionClient:
+    """asyncio variant of DetectionClient built on a pooled httpx.AsyncClient"""
+
+    def __init__(self, base_url=DETECTION_URL, timeout=5.0, retries=2, max_in_flight=2, jpeg_quality=90):
+        import httpx
+
+        self.url = f"{base_url}/predict"
+        self.retries = retries
+        self.jpeg_quality = jpeg_quality
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight),
+        )
+        self._slots = asyncio.Semaphore(max_in_flight)
+
+    async def detect(self, frame, threshold=0.5, **options):
+        payload = {"encoded_image": encode_frame(frame, self.jpeg_quality), "threshold": threshold, **options}
+        async with self._slots:
+            response = await _post_with_retries(self.client, self.url, payload, self.retries, 0.1)
+        return response.json()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+
+class AsyncTtsClient:
+    """asyncio variant of TtsClient"""
+
+    def __init__(self, base_url=TTS_URL, timeout=60.0, retries=2):
+        import httpx
+
+        self.base_url = base_url
+        self.retries = retries
+        self.client = httpx.AsyncClient(timeout=timeout)
+
+    async def synthesize(self, text, voice="af_heart", speed=1.0, audio_format="wav"):
+        payload = {"text": text, "voice": voice, "speed": speed,
+                   "response_format": "binary", "audio_format": audio_format}
+        response = await _post_with_retries(self.client, f"{self.base_url}/predict", payload, self.retries, 0.1)
+        if response.headers.get("content-type", "").startswith("application/json"):
+            raise RuntimeError(response.json().get("error") or "unexpected JSON response")
+        audio = decode_audio(response.content, response.headers["X-Audio-Format"])
+        return audio, int(response.headers["X-Sample-Rate"]), response.headers
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
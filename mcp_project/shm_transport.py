@@ -0,0 +1,165 @@
+"""
+Shared-memory frame transport between a camera client and a YOLO server on the same machine
+
+The client owns a multiprocessing.shared_memory block split into fixed-size
+slots. It copies a raw frame into a free slot and sends only the block name,
+the slot offset and the frame shape over HTTP; the server maps the same block
+once and views the frame in place as a numpy array, so there is no JPEG
+encode, base64 or JSON body proportional to the image.
+
+Every slot starts with an 8-byte sequence number that the client bumps before
+writing a frame and sends along with the request. A request that timed out
+on the client may still be queued on the server after its slot was reused,
+so the server reads the sequence number again once it has copied the frame
+out and rejects the request if it no longer matches, instead of returning
+detections for a different or half-written frame.
+"""
+
+import queue
+import threading
+from collections import OrderedDict
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+# Only blocks created by SharedFrameRing can be attached by the server
+NAME_PREFIX = "yolo_frames_"
+
+# Sequence number in front of every frame
+HEADER_BYTES = 8
+
+# Blocks created by this process, which its resource tracker already owns
+_owned = set()
+
+
+class SharedFrameRing:
+    """Client side: a shared-memory block of equally sized frame slots"""
+
+    def __init__(self, slots, frame_bytes):
+        self.slots = slots
+        # Header plus frame, rounded up so every header stays 8-byte aligned
+        self.slot_bytes = HEADER_BYTES + -(-frame_bytes // 8) * 8
+        self.shm = None
+        # Retry on the (unlikely) clash with an existing block name
+        for _ in range(8):
+            name = f"{NAME_PREFIX}{np.random.default_rng().integers(1 << 48):012x}"
+            try:
+                self.shm = shared_memory.SharedMemory(name=name, create=True, size=slots * self.slot_bytes)
+                break
+            except FileExistsError:
+                continue
+        if self.shm is None:
+            raise RuntimeError("Could not create a shared-memory frame block")
+        self.name = self.shm.name
+        _owned.add(self.name)
+        self._free = queue.Queue()
+        for slot in range(slots):
+            self._free.put(slot)
+        self._sequence = 0
+        self._sequence_lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        """Take a free slot; blocks while every slot is still in flight"""
+        return self._free.get(timeout=timeout)
+
+    def release(self, slot):
+        self._free.put(slot)
+
+    def write(self, slot, frame):
+        """Copy a uint8 frame into a slot. Returns (offset, shape, sequence) for the request."""
+        frame = np.ascontiguousarray(frame, dtype=np.uint8)
+        if frame.nbytes > self.slot_bytes - HEADER_BYTES:
+            raise ValueError(f"Frame of {frame.nbytes} bytes does not fit a "
+                             f"{self.slot_bytes - HEADER_BYTES}-byte slot")
+        with self._sequence_lock:
+            self._sequence += 1
+            sequence = self._sequence
+        header = slot * self.slot_bytes
+        offset = header + HEADER_BYTES
+        # The header changes before the pixels, so a reader that copied pixels from
+        # a reused slot always sees a different sequence number afterwards
+        self.shm.buf[header:offset] = sequence.to_bytes(HEADER_BYTES, "little")
+        view = np.ndarray(frame.shape, dtype=np.uint8, buffer=self.shm.buf, offset=offset)
+        np.copyto(view, frame)
+        return offset, list(frame.shape), sequence
+
+    def close(self):
+        """Release and remove the block; the server's mapping stays valid until it closes it"""
+        if self.shm is None:
+            return
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+        _owned.discard(self.name)
+        self.shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attach(name):
+    """Map an existing block without taking ownership of it"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching registers the block with this process's
+        # resource tracker, which would unlink it under the client at exit
+        shm = shared_memory.SharedMemory(name=name)
+        if name not in _owned:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class SharedFrameReader:
+    """Server side: keeps blocks mapped between requests and views frames in place"""
+
+    def __init__(self, max_blocks=8):
+        self.max_blocks = max_blocks
+        self._blocks = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _block(self, name):
+        with self._lock:
+            shm = self._blocks.get(name)
+            if shm is not None:
+                self._blocks.move_to_end(name)
+                return shm
+            shm = attach(name)
+            self._blocks[name] = shm
+            # Clients that restarted leave stale blocks behind; drop the oldest mapping
+            while len(self._blocks) > self.max_blocks:
+                _, old = self._blocks.popitem(last=False)
+                try:
+                    old.close()
+                except BufferError:
+                    pass  # a frame view is still alive; the mapping goes away with it
+            return shm
+
+    def view(self, name, offset, shape):
+        """Zero-copy uint8 array over a frame written by SharedFrameRing.write()"""
+        if not name.startswith(NAME_PREFIX):
+            raise ValueError(f"shm_name must start with {NAME_PREFIX!r}")
+        shape = tuple(int(v) for v in shape)
+        if len(shape) not in (2, 3) or any(v <= 0 for v in shape):
+            raise ValueError(f"Invalid frame shape {list(shape)}")
+        shm = self._block(name)
+        size = int(np.prod(shape))
+        if offset < HEADER_BYTES or offset + size > shm.size:
+            raise ValueError(f"Frame at offset {offset} runs past the end of {name}")
+        return np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=offset)
+
+    def sequence(self, name, offset):
+        """Sequence number currently in front of the frame at offset"""
+        shm = self._block(name)
+        return int.from_bytes(shm.buf[offset - HEADER_BYTES:offset], "little")
+
+    def close(self):
+        with self._lock:
+            for shm in self._blocks.values():
+                shm.close()
+            self._blocks.clear()
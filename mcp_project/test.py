@@ -1,64 +1,119 @@
+import argparse
+import os
+import sys
 import cv2
+import numpy as np
 import requests
-import time
-import sys
+import soundfile as sf
+from collections import deque
 import test_tts
+from alerts import AlertWorker, DetectionDebouncer
+from service_client import TRANSPORTS, DetectionClient
+
+# The tracker lives with the local detection scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "live_detection_model"))
+from tracker import KeyframeScheduler, Tracker
+from video_source import VideoSource
 
 
 # MCP API URL
-MCP_URL = "http://localhost:8000/predict"
+MCP_URL = "http://localhost:8000"
+
+# Frames sent before the first answer comes back; frame N+1 is sent while N is processed
+MAX_IN_FLIGHT = 2
+
+# Only detections above this confidence count towards an alert
+ALERT_CONFIDENCE = 0.8
+
+# Pooled keep-alive connections, timeouts and retries live in the client
+detection_client = DetectionClient(MCP_URL, timeout=5, max_in_flight=MAX_IN_FLIGHT)
+
+# Alert when a confident detection shows up in 3 of the last 5 results, at most every 10 s
+alert_debouncer = DetectionDebouncer(k=3, n=5, cooldown=10.0)
 
 def process_frame(frame):
-    """Process a single frame through the YOLO MCP"""
+    """Process a single frame through the YOLO MCP and wait for the result"""
+    return collect_result(detection_client.submit(frame, threshold=0.5))
+
+def collect_result(future):
+    """Return the response of a finished request, or None if it failed"""
     try:
-        # Save frame to temporary file
-        frame_path = "current_frame.jpg"
-        cv2.imwrite(frame_path, frame)
-        
-        # Prepare request payload
-        payload = {
-            "data_path": frame_path,
-            "threshold": 0.5
-        }
-        
-        # Send to YOLO MCP
-        response = requests.post(MCP_URL, json=payload, timeout=5)
-        
-        if response.status_code == 200:
-            result = response.json()
-            return result
-        else:
-            print(f"❌ MCP API error: {response.status_code}")
-            return None
-            
+        return future.result()
+    except requests.exceptions.HTTPError as e:
+        print(f"❌ MCP API error: {e.response.status_code}")
     except requests.exceptions.RequestException as e:
         print(f"❌ Connection error: {str(e)}")
-        return None
     except Exception as e:
         print(f"❌ Processing error: {str(e)}")
+    return None
+
+def handle_result(result, alert_worker):
+    """Print detections from one response and raise an alert once a detection persists"""
+    confident = bool(result) and any(conf > ALERT_CONFIDENCE for conf in result.get("confidence", []))
+    if alert_debouncer.update(confident):
+        sayWords(alert_worker)
+    
+    if result:
+        # Extract bounding boxes and confidence
+        bounding_boxes = result.get("result", [])
+        confidence_scores = result.get("confidence", [])
+        
+        # Print results
+        if bounding_boxes:
+            print(f"🎯 Detected {len(bounding_boxes)} objects:")
+            for i, (bbox, conf) in enumerate(zip(bounding_boxes, confidence_scores)):
+                x1, y1, x2, y2 = bbox
+                print(f"   Object {i+1}: Box [{x1:.1f}, {y1:.1f}, {x2:.1f}, {y2:.1f}], Confidence: {conf:.3f}")
+        else:
+            print("🔍 No objects detected in this frame")
+    else:
+        print("❌ Failed to process frame")
 
-        return None
-def sayWords():
-    print("🎯 Detected 1 objects:")
-    # Call the test_tts_mcp function from the test_tts module
-    test_tts.test_tts_mcp()
-    sys.exit("Object Detected and audio played")
+def track_result(result, tracker):
+    """Feed a keyframe's detections to the tracker and announce newly confirmed objects"""
+    seen = set(tracker.confirmed_ids)
+    boxes = np.asarray(result.get("result", []), dtype=np.float64).reshape(-1, 4)
+    tracker.update(boxes, result.get("confidence", []))
+    for track_id in sorted(tracker.confirmed_ids - seen):
+        print(f"🆕 New object #{track_id} (unique so far: {tracker.unique_count})")
 
+def speak(text):
+    """Synthesize and play an alert; runs on the alert worker thread"""
+    audio, sample_rate, _ = test_tts.tts_client.synthesize(text, voice="af_nicole")
+    # The system-player fallback in play_audio plays this file
+    sf.write("test_output.wav", audio, sample_rate)
+    test_tts.play_audio(audio, sample_rate)
 
+def sayWords(alert_worker):
+    """Queue the spoken alert without blocking the detection loop"""
+    print("🔊 Object confirmed across frames, playing alert")
+    if not alert_worker.trigger():
+        print("🔇 Alert already playing, skipped")
 
-def run_live_detection():
+
+def run_live_detection(source=0, track=False, keyframe_interval=5, motion_threshold=None):
     """Run live video detection"""
     print("🚀 Starting Live Video Detection")
+    if track:
+        print(f"🎯 Tracking mode: a frame is sent every {keyframe_interval} frames")
     print("Controls: 'q' to quit")
     
-    cap = cv2.VideoCapture(0)
+    # Camera id, video file or RTSP/HTTP URL, decoded on its own thread. submit() copies
+    # each frame out before returning, so the pooled buffers can be reused.
+    cap = VideoSource(source)
     
     if not cap.isOpened():
-        print("❌ Error: Could not open camera")
+        print(f"❌ Error: Could not open video source {source}")
         return
     
     print("✅ Camera opened successfully")
     
+    pending = deque()
+    alert_worker = AlertWorker(speak)
+    tracker = Tracker() if track else None
+    scheduler = KeyframeScheduler(keyframe_interval, motion_threshold) if track else None
+    keyframe_due = False
+    sent = 0
     try:
         while True:
             ret, frame = cap.read()
@@ -66,26 +121,30 @@ def run_live_detection():
                 print("❌ Error: Could not read frame")
                 break
 
-            # Process frame
-            result = process_frame(frame)
+            # The scheduler sees every frame so its interval and motion reference follow the video;
+            # in tracking mode a keyframe stays due until a request slot frees up
+            if scheduler is None or scheduler.is_keyframe(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)):
+                keyframe_due = True
+
+            # Send the frame if a request slot is free; otherwise skip it instead of queueing stale frames
+            if keyframe_due and detection_client.has_capacity():
+                pending.append(detection_client.submit(frame, threshold=0.5))
+                keyframe_due = False
+                sent += 1
+            
+            # Handle finished requests in the order they were sent
+            updated = False
+            while pending and pending[0].done():
+                result = collect_result(pending.popleft())
+                handle_result(result, alert_worker)
+                if tracker is not None and result:
+                    track_result(result, tracker)
+                    updated = True
+
+            # Carry the tracks forward on frames without fresh detections
+            if tracker is not None and not updated:
+                tracker.predict()
             
-            if result:
-                # Extract bounding boxes and confidence
-                bounding_boxes = result.get("result", [])
-                confidence_scores = result.get("confidence", [])
-                
-                # Print results
-                if bounding_boxes:
-                    print(f"🎯 Detected {len(bounding_boxes)} objects:")
-                    for i, (bbox, conf) in enumerate(zip(bounding_boxes, confidence_scores)):
-                        x1, y1, x2, y2 = bbox
-                        print(f"   Object {i+1}: Box [{x1:.1f}, {y1:.1f}, {x2:.1f}, {y2:.1f}], Confidence: {conf:.3f}")
-                        if conf > 0.8:  # Only call sayWords for high confidence detections
-                            sayWords()
-                else:
-                    print("🔍 No objects detected in this frame")
-            else:
-                print("❌ Failed to process frame")
             # Show the frame
             cv2.imshow("Live Detection", frame)
             
@@ -95,16 +154,32 @@ def run_live_detection():
                 print("🛑 Quitting...")
                 break
 
-            # Small delay to prevent overloading
-            time.sleep(0.1)
-
     except KeyboardInterrupt:
         print("\n🛑 Interrupted by user")
         
     finally:
         cap.release()
         cv2.destroyAllWindows()
+        detection_client.close()
+        alert_worker.close()
+        if tracker is not None:
+            print(f"🎯 Sent {sent}/{scheduler.frames} frames ({scheduler.keyframes} keyframes scheduled) | "
+                  f"unique objects: {tracker.unique_count}")
         print("👋 Live detection stopped")
 
 if __name__ == "__main__":
-    run_live_detection() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Live detection through the YOLO MCP server")
+    parser.add_argument("--source", default="0", help="Camera id, video file, or RTSP/HTTP URL")
+    parser.add_argument("--track", action="store_true",
+                        help="Send keyframes only and track objects in between")
+    parser.add_argument("--keyframe-interval", type=int, default=5)
+    parser.add_argument("--motion-threshold", type=float, default=None,
+                        help="Also send a keyframe when the scene changes by more than this (0-255)")
+    parser.add_argument("--transport", default="jpeg", choices=TRANSPORTS,
+                        help="shm passes raw frames through shared memory (server on this machine only)")
+    args = parser.parse_args()
+    if args.transport != detection_client.transport:
+        detection_client.close()
+        detection_client = DetectionClient(MCP_URL, timeout=5, max_in_flight=MAX_IN_FLIGHT,
+                                           transport=args.transport)
+    run_live_detection(args.source, args.track, args.keyframe_interval, args.motion_threshold)
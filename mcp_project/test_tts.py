@@ -10,6 +10,9 @@ import numpy as np
 import subprocess
 import os
 import platform
+import sys
+import time
+from service_client import TtsClient
 
 # Audio playback imports (optional)
 try:
@@ -18,60 +21,95 @@ try:
 except ImportError:
     PYGAME_AVAILABLE = False
 
+# One pooled client per process so repeated alerts reuse the same connection
+tts_client = TtsClient()
+
 def test_tts_mcp():
     """Test the TTS MCP with Kokoro integration"""
     
-    # MCP server URL (assuming it's running on port 8002)
-    url = "http://localhost:8001/predict"
-    
     # Test text from the Kokoro example
     test_text = """
     Object Detected! Picking up your clothes now. 
     """
     
-    # Test request payload
-    payload = {
-        "text": test_text,
-        "voice": "af_nicole",  # Using the voice from the example
-        "speed": 1.0
-    }
-    
     try:
         print("Sending TTS request to MCP server...")
-        response = requests.post(url, json=payload)
+        # Ask for compact binary WAV instead of the legacy JSON float list
+        audio, sample_rate, headers = tts_client.synthesize(test_text, voice="af_nicole", speed=1.0)
         
-        if response.status_code == 200:
-            result = response.json()
-            
-            if "error" in result and result["error"]:
-                print(f"Error: {result['error']}")
-                return
-            
-            print(f"Success! Generated audio for text: {result['text'][:100]}...")
-            print(f"Voice used: {result['voice']}")
-            print(f"Speed: {result['speed']}")
-            print(f"Sample rate: {result['sample_rate']}")
-            
-            # Get the audio data directly (no need to decode base64)
-            audio_data = result["audio_data"]
-            sample_rate = result["sample_rate"]
-            
-            # Convert list back to numpy array
-            audio = np.array(audio_data, dtype=np.float32)
-            print(f"Audio loaded: {len(audio)} samples at {sample_rate} Hz")
+        print(f"Success! Generated audio for text: {test_text.strip()[:100]}...")
+        print(f"Voice used: {headers.get('X-Voice')}")
+        print(f"Speed: {headers.get('X-Speed')}")
+        print(f"Sample rate: {sample_rate}")
+        print(f"Audio loaded: {len(audio)} samples at {sample_rate} Hz")
+        
+        # Save as WAV file
+        sf.write("test_output.wav", audio, sample_rate)
+        print("Audio saved as 'test_output.wav'")
+        
+        # Play the audio
+        print("Playing audio...")
+        play_audio(audio, sample_rate)
             
-            # Save as WAV file
+    except requests.exceptions.ConnectionError:
+        print("Error: Could not connect to MCP server. Make sure it's running on port 8001.")
+    except requests.exceptions.HTTPError as e:
+        print(f"Error: HTTP {e.response.status_code}")
+        print(e.response.text)
+    except Exception as e:
+        print(f"Error: {e}")
+
+def stream_tts(text, voice="af_heart", speed=1.0, audio_format="int16"):
+    """Yield float32 audio chunks from the streaming endpoint as soon as each segment arrives"""
+    return tts_client.stream(text, voice=voice, speed=speed, audio_format=audio_format)
+
+def play_stream(chunks, sample_rate=24000):
+    """Start playback on the first chunk and queue the rest as they arrive. Returns all audio."""
+    received = []
+    if not PYGAME_AVAILABLE:
+        # Without pygame we can only play once everything has arrived
+        received = list(chunks)
+        if received:
+            audio = np.concatenate(received)
             sf.write("test_output.wav", audio, sample_rate)
-            print("Audio saved as 'test_output.wav'")
-            
-            # Play the audio
-            print("Playing audio...")
             play_audio(audio, sample_rate)
-            
+        return np.concatenate(received) if received else np.zeros(0, dtype=np.float32)
+
+    pygame.mixer.init(frequency=sample_rate, size=-16, channels=1)
+    channel = None
+    for chunk in chunks:
+        received.append(chunk)
+        pcm = (np.clip(chunk, -1.0, 1.0) * 32767).astype(np.int16)
+        sound = pygame.mixer.Sound(buffer=pcm.tobytes())
+        if channel is None:
+            channel = sound.play()
         else:
-            print(f"Error: HTTP {response.status_code}")
-            print(response.text)
-            
+            # A channel holds one queued sound; wait for the slot to free up
+            while channel.get_queue() is not None:
+                pygame.time.wait(10)
+            channel.queue(sound)
+    while channel is not None and channel.get_busy():
+        pygame.time.wait(50)
+    pygame.mixer.quit()
+    return np.concatenate(received) if received else np.zeros(0, dtype=np.float32)
+
+def test_tts_stream():
+    """Stream the alert phrase and report time-to-first-audio"""
+    text = "Object Detected! Picking up your clothes now."
+    start = time.perf_counter()
+    first_chunk_at = None
+
+    def timed_chunks():
+        nonlocal first_chunk_at
+        for chunk in stream_tts(text, voice="af_nicole"):
+            if first_chunk_at is None:
+                first_chunk_at = time.perf_counter()
+                print(f"First audio after {(first_chunk_at - start) * 1000:.0f} ms")
+            yield chunk
+
+    try:
+        audio = play_stream(timed_chunks())
+        print(f"Streamed {len(audio)} samples in {time.perf_counter() - start:.2f} s")
     except requests.exceptions.ConnectionError:
         print("Error: Could not connect to MCP server. Make sure it's running on port 8001.")
     except Exception as e:
@@ -123,4 +161,7 @@ def play_audio(audio, sample_rate):
         print("Audio saved as 'test_output.wav' - you can play it manually.")
 
 if __name__ == "__main__":
-    test_tts_mcp() 
\ No newline at end of file
+    if "--stream" in sys.argv:
+        test_tts_stream()
+    else:
+        test_tts_mcp() 
\ No newline at end of file
@@ -0,0 +1,50 @@
+import numpy as np
+
+
+def wsola(audio: np.ndarray, speed: float, sample_rate: int = 24000,
+          frame_ms: float = 30.0, tolerance_ms: float = 7.5) -> np.ndarray:
+    """Pitch-preserving time-stretch (Waveform Similarity Overlap-Add).
+
+    speed > 1 shortens the audio, speed < 1 lengthens it. The output is
+    allocated once and filled frame by frame; each alignment search only
+    looks at a tolerance-sized window of the input, so memory stays
+    proportional to the frame size rather than the clip length.
+    """
+    audio = np.asarray(audio, dtype=np.float32).reshape(-1)
+    if speed == 1.0 or len(audio) == 0:
+        return audio
+    if speed <= 0:
+        raise ValueError("speed must be positive")
+
+    frame = max(int(sample_rate * frame_ms / 1000) // 2 * 2, 16)
+    hop_out = frame // 2
+    hop_in = hop_out * speed
+    tolerance = max(int(sample_rate * tolerance_ms / 1000), 1)
+    if len(audio) < frame + 2 * tolerance:
+        # Too short to align frames; fall back to plain index stretching
+        indices = np.minimum((np.arange(int(len(audio) / speed)) * speed).astype(np.int64), len(audio) - 1)
+        return audio[indices]
+
+    # Periodic Hann windows at 50% overlap sum to one
+    window = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(frame) / frame)).astype(np.float32)
+    # Nothing overlaps the first half of the first frame, so don't fade it in
+    first_window = window.copy()
+    first_window[:hop_out] = 1.0
+    out_len = int(len(audio) / speed)
+    n_frames = out_len // hop_out + 1
+    output = np.zeros(n_frames * hop_out + frame, dtype=np.float32)
+    last_start = len(audio) - frame
+
+    start = 0
+    for k in range(n_frames):
+        segment = audio[start:start + frame]
+        output[k * hop_out:k * hop_out + frame] += (first_window if k == 0 else window) * segment
+        # The natural continuation of the frame we just placed, hop_out samples later
+        natural = audio[min(start + hop_out, last_start):min(start + hop_out, last_start) + frame]
+        nominal = int(round((k + 1) * hop_in))
+        lo = min(max(nominal - tolerance, 0), last_start)
+        hi = min(max(nominal + tolerance, 0), last_start)
+        # Cross-correlate every candidate offset in the tolerance window in one call
+        start = lo + int(np.argmax(np.correlate(audio[lo:hi + frame], natural, mode="valid")))
+
+    return output[:out_len]
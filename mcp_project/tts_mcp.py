@@ -1,84 +1,283 @@
-from pydantic import BaseModel
+import argparse
+import asyncio
+import time
+import uuid
+from collections import deque
+from typing import Any, Literal, NamedTuple
+# Sets up prometheus_client multiprocess mode, so it comes before anything that may import it
+from metrics import MetricsMiddleware, StageTimer, add_metrics_route, prune_metrics_dir
+from fastapi import HTTPException, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, PrivateAttr
 from litserve.mcp import MCP
+from litserve.specs.base import LitSpec
+from litserve.utils import LitAPIStatus, ResponseBufferItem
 import litserve as ls
 import base64
 import soundfile as sf
 from io import BytesIO
-from kokoro import KPipeline
+from kokoro import KModel, KPipeline
 import torch
 import numpy as np
+from audio_cache import AudioCache
+from time_stretch import wsola
+
+SAMPLE_RATE = 24000
+
+# Voices preloaded and warmed up at startup unless --voices says otherwise
+DEFAULT_VOICES = ("af_heart", "af_nicole")
+WARMUP_TEXT = "Ready."
+
+def voice_lang(voice: str) -> str:
+    """Kokoro voice names start with their language code, e.g. 'af_heart' -> 'a'"""
+    return voice[0]
 
 # Define the request schema for TTS
 class TtsRequest(BaseModel):
     text: str
     voice: str = "af_heart"  # Default to af_heart as shown in the example
     speed: float = 1.0
+    # "json": audio_data as a list of floats (legacy), "base64": audio_base64 in JSON,
+    # "binary": the raw audio bytes as the response body
+    response_format: Literal["json", "base64", "binary"] = "json"
+    # Encoding of the audio for the base64 and binary formats
+    audio_format: Literal["wav", "float32", "int16"] = "wav"
+    # Set by TtsSpec from the route the request came in on, never by clients
+    _stream: bool = PrivateAttr(False)
+
+MEDIA_TYPES = {
+    "wav": "audio/wav",
+    "float32": "application/octet-stream",
+    "int16": "application/octet-stream",
+}
+
+def encode_audio(audio: np.ndarray, audio_format: str) -> bytes:
+    """Encode a float32 waveform as WAV (16-bit PCM) or raw little-endian PCM bytes"""
+    if audio_format == "wav":
+        buffer = BytesIO()
+        sf.write(buffer, audio, SAMPLE_RATE, format="WAV", subtype="PCM_16")
+        return buffer.getvalue()
+    if audio_format == "int16":
+        return (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+    return audio.astype("<f4", copy=False).tobytes()
+
+class WholeClip(NamedTuple):
+    """The single output of a /predict request. LitServe turns dict outputs of a streaming
+    API into NDJSON lines; a tuple reaches the API server as it is."""
+    response: Any
+
+class TtsSpec(LitSpec):
+    """/predict (whole clips) and /stream (one NDJSON line per Kokoro segment) in front of one
+    streaming Tts worker, so both routes share its Kokoro model and phrase cache"""
+
+    def __init__(self):
+        super().__init__()
+        self.api_path = "/predict"
+
+    @property
+    def stream(self):
+        return True
+
+    def pre_setup(self, lit_api: "ls.LitAPI"):
+        self.add_endpoint("/predict", self.predict, ["POST"])
+        self.add_endpoint("/stream", self.stream_segments, ["POST"])
+
+    def decode_request(self, request, context_kwargs=None):
+        return request
+
+    def encode_response(self, output, context_kwargs=None):
+        return output
+
+    def submit(self, request: TtsRequest):
+        """Queue the request for the worker. Returns (uid, async iterator of (output, status))."""
+        uid = str(uuid.uuid4())
+        outputs, available = deque(), asyncio.Event()
+        self.response_buffer[uid] = ResponseBufferItem(response_queue=outputs, event=available)
+        self.request_queue.put((self.response_queue_id, uid, time.monotonic(), request))
+        return uid, self.data_streamer(outputs, available, send_status=True)
+
+    @staticmethod
+    def raise_error(error):
+        if isinstance(error, HTTPException):
+            raise error
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    async def predict(self, request: TtsRequest):
+        uid, outputs = self.submit(request)
+        clip = None
+        try:
+            async for output, status in outputs:
+                if status == LitAPIStatus.ERROR:
+                    self.raise_error(output)
+                clip = output
+        finally:
+            self.response_buffer.pop(uid, None)
+        if clip is None:
+            self.raise_error(None)
+        return clip.response
+
+    async def stream_segments(self, request: TtsRequest):
+        request._stream = True
+        uid, outputs = self.submit(request)
+
+        async def lines():
+            try:
+                async for output, status in outputs:
+                    if status == LitAPIStatus.ERROR:
+                        yield '{"error": "Internal server error"}\n'
+                        return
+                    yield output
+            finally:
+                self.response_buffer.pop(uid, None)
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 # Define the MCP API
 class Tts(ls.LitAPI):
+    # Label of this API's series in the Prometheus metrics
+    metrics_name = "tts"
+
+    def __init__(self, voices=DEFAULT_VOICES, cache_size: int = 256, cache_dir: str = None, **kwargs):
+        super().__init__(spec=TtsSpec(), **kwargs)
+        self.voices = tuple(voices)
+        self.cache_size = cache_size
+        self.cache_dir = cache_dir
+
     def setup(self, device: str):
         # Initialize Kokoro pipeline
         # Force CPU usage to avoid GPU requirements
         if torch.cuda.is_available():
             torch.cuda.empty_cache()
         
-        # Initialize the pipeline with American English
-        self.pipeline = KPipeline(lang_code="a")  # 'a' = American English
+        setup_start = time.perf_counter()
+        self.stage_timer = StageTimer(self.metrics_name)
+        # One KModel on CPU shared by every language pipeline; only G2P differs per language
+        self.model = KModel().to('cpu').eval()
+        self.pipelines = {}
+        self._served_voices = set()
+        self.ready = False
         
-        # Ensure the pipeline runs on CPU
-        if hasattr(self.pipeline, 'to'):
-            self.pipeline.to('cpu')
+        # Load every configured voice and run a dummy synthesis so no request pays the cold start
+        for voice in self.voices:
+            voice_start = time.perf_counter()
+            pipeline = self.pipeline_for(voice)
+            pipeline.load_voice(voice)
+            for _ in pipeline(WARMUP_TEXT, voice=voice):
+                pass
+            print(f"Warmed up voice {voice} in {(time.perf_counter() - voice_start) * 1000:.0f} ms")
         
-        print("TTS MCP initialized with Kokoro TTS")
+        # Repeated phrases (alerts) skip synthesis entirely
+        self.cache = AudioCache(max_entries=self.cache_size, disk_dir=self.cache_dir)
+        self.ready = True
+        self.stage_timer.model_loaded(time.perf_counter() - setup_start)
+        
+        print(f"TTS MCP initialized with Kokoro TTS in {time.perf_counter() - setup_start:.2f} s "
+              f"(languages: {', '.join(sorted(self.pipelines))}; voices: {', '.join(self.voices)})")
+
+    def pipeline_for(self, voice: str):
+        """Return the pipeline for the voice's language, creating it on first use"""
+        lang = voice_lang(voice)
+        if lang not in self.pipelines:
+            if self.ready:
+                print(f"⚠️  Language '{lang}' was not preloaded; add {voice} to --voices to avoid this cold start")
+            self.pipelines[lang] = KPipeline(lang_code=lang, model=self.model)
+        return self.pipelines[lang]
+
+    def log_first_request(self, voice: str, started: float):
+        """Log the latency of the first request served with each voice"""
+        if voice not in self._served_voices:
+            self._served_voices.add(voice)
+            print(f"First request for voice {voice} took {(time.perf_counter() - started) * 1000:.0f} ms")
 
     def decode_request(self, request: TtsRequest):
-        return {
+        start = time.perf_counter()
+        inputs = {
             "text": request.text,
             "voice": request.voice,
-            "speed": request.speed
+            "speed": request.speed,
+            "response_format": request.response_format,
+            "audio_format": request.audio_format,
+            "stream": request._stream
         }
+        self.stage_timer.observe("decode", time.perf_counter() - start)
+        return inputs
 
-    def predict(self, inputs: dict):
-        text = inputs["text"]
-        voice = inputs["voice"]
-        speed = inputs["speed"]
+    def cached_phrase(self, text: str, voice: str, speed: float):
+        """Return (cache_key, cached entry or None), recording the lookup"""
+        start = time.perf_counter()
+        cache_key = self.cache.make_key(text, voice, speed, voice_lang(voice))
+        cached = self.cache.get(cache_key)
+        self.stage_timer.observe("cache", time.perf_counter() - start)
+        self.stage_timer.cache(cached is not None)
+        return cache_key, cached
 
+    def synthesize_segments(self, text: str, voice: str, speed: float):
+        """Yield (gs, ps, audio) for every segment as soon as Kokoro produces it"""
+        # The pipeline returns a generator that yields (gs, ps, audio) tuples
+        # gs = grapheme sequence, ps = phoneme sequence, audio = audio data
         try:
-            # Run Kokoro TTS pipeline
-            # The pipeline returns a generator that yields (gs, ps, audio) tuples
-            generator = self.pipeline(text, voice=voice)
-            
-            # Get the first (and typically only) audio segment
-            # gs = grapheme sequence, ps = phoneme sequence, audio = audio data
-            gs, ps, audio = next(generator)
-            
+            # Kokoro scales phoneme durations itself, which keeps pitch and avoids resampling
+            generator = self.pipeline_for(voice)(text, voice=voice, speed=speed)
+            native_speed = True
+        except TypeError:
+            # Pipelines without a speed argument get a pitch-preserving WSOLA stretch instead
+            generator = self.pipeline_for(voice)(text, voice=voice)
+            native_speed = False
+        
+        for gs, ps, audio in generator:
             # Ensure audio is a numpy array
             if torch.is_tensor(audio):
                 audio = audio.cpu().numpy()
             elif isinstance(audio, list):
                 audio = np.array(audio)
             
-            # Apply speed adjustment if needed
-            if speed != 1.0:
-                # Simple speed adjustment by resampling
-                # This is a basic implementation - for production, consider using librosa
-                original_length = len(audio)
-                new_length = int(original_length / speed)
-                indices = np.linspace(0, original_length - 1, new_length, dtype=int)
-                audio = audio[indices]
+            if not native_speed and speed != 1.0:
+                audio = wsola(audio, speed, SAMPLE_RATE)
             
-            # Convert audio to list for JSON serialization
-            audio_list = audio.tolist()
+            yield gs, ps, audio.astype(np.float32, copy=False)
+
+    def predict(self, inputs: dict):
+        if inputs["stream"]:
+            yield from self.stream_segments(inputs)
+        else:
+            yield self.synthesize_clip(inputs)
+
+    def synthesize_clip(self, inputs: dict):
+        started = time.perf_counter()
+        text = inputs["text"]
+        voice = inputs["voice"]
+        speed = inputs["speed"]
 
+        try:
+            cache_key, cached = self.cached_phrase(text, voice, speed)
+            if cached is not None:
+                gs, ps, audio = cached
+            else:
+                # Run Kokoro TTS pipeline and keep every segment, not just the first
+                synth_start = time.perf_counter()
+                segments = list(self.synthesize_segments(text, voice, speed))
+                self.stage_timer.observe("synthesize", time.perf_counter() - synth_start)
+                if not segments:
+                    raise ValueError("Kokoro produced no audio for this text")
+                gs = " ".join(gs for gs, _, _ in segments)
+                ps = " ".join(ps for _, ps, _ in segments)
+                audio = np.concatenate([audio for _, _, audio in segments])
+                self.cache.put(cache_key, gs, ps, audio)
+            self.log_first_request(voice, started)
+            
+            # Serialization depends on the requested response format, see encode_response
             return {
                 "text": text,
                 "voice": voice,
                 "speed": speed,
                 "grapheme_sequence": gs,
                 "phoneme_sequence": ps,
-                "audio_data": audio_list,  # Raw audio data as list
-                "sample_rate": 24000,
-                "audio_format": "float32"
+                "audio": audio,
+                "sample_rate": SAMPLE_RATE,
+                "response_format": inputs["response_format"],
+                "audio_format": inputs["audio_format"],
+                "cache_hit": cached is not None,
+                "cache_stats": self.cache.stats()
             }
             
         except Exception as e:
@@ -91,22 +290,123 @@ class Tts(ls.LitAPI):
                 "audio_data": []
             }
 
-    def encode_response(self, output: dict):
-        return {
+    def stream_segments(self, inputs: dict):
+        started = time.perf_counter()
+        text, voice, speed = inputs["text"], inputs["voice"], inputs["speed"]
+        try:
+            cache_key, cached = self.cached_phrase(text, voice, speed)
+            if cached is not None:
+                # A cached phrase is already complete, so send it as a single chunk
+                gs, ps, audio = cached
+                self.log_first_request(voice, started)
+                yield {"chunk": True, "index": 0, "grapheme_sequence": gs, "phoneme_sequence": ps, "audio": audio,
+                       "audio_format": inputs["audio_format"], "cache_hit": True, "cache_stats": self.cache.stats()}
+                return
+            segments = []
+            for index, (gs, ps, audio) in enumerate(self.synthesize_segments(text, voice, speed)):
+                segments.append((gs, ps, audio))
+                if index == 0:
+                    # For streams the latency that matters is time to the first chunk
+                    self.log_first_request(voice, started)
+                    self.stage_timer.observe("first_chunk", time.perf_counter() - started)
+                yield {"chunk": True, "index": index, "grapheme_sequence": gs, "phoneme_sequence": ps, "audio": audio,
+                       "audio_format": inputs["audio_format"], "cache_hit": False, "cache_stats": self.cache.stats()}
+            self.stage_timer.observe("synthesize", time.perf_counter() - started)
+            if segments:
+                self.cache.put(cache_key, " ".join(s[0] for s in segments), " ".join(s[1] for s in segments),
+                               np.concatenate([s[2] for s in segments]))
+        except Exception as e:
+            yield {"chunk": True, "error": str(e)}
+
+    def encode_response(self, outputs):
+        for output in outputs:
+            if output.get("chunk"):
+                yield self.encode_chunk(output)
+                continue
+            start = time.perf_counter()
+            response = self.build_response(output)
+            self.stage_timer.observe("encode", time.perf_counter() - start)
+            yield WholeClip(response)
+
+    def encode_chunk(self, output: dict):
+        if "error" in output:
+            return {"error": output["error"]}
+        start = time.perf_counter()
+        chunk = {
+            "index": output["index"],
+            "grapheme_sequence": output["grapheme_sequence"],
+            "phoneme_sequence": output["phoneme_sequence"],
+            "audio_base64": base64.b64encode(encode_audio(output["audio"], output["audio_format"])).decode("utf-8"),
+            "audio_format": output["audio_format"],
+            "sample_rate": SAMPLE_RATE,
+            "cache_hit": output["cache_hit"],
+            "cache_stats": output["cache_stats"],
+        }
+        self.stage_timer.observe("encode_chunk", time.perf_counter() - start)
+        return chunk
+
+    def build_response(self, output: dict):
+        response = {
             "text": output["text"],
             "voice": output["voice"],
             "speed": output["speed"],
             "grapheme_sequence": output.get("grapheme_sequence", ""),
             "phoneme_sequence": output.get("phoneme_sequence", ""),
-            "audio_data": output["audio_data"],
-            "sample_rate": output.get("sample_rate", 24000),
-            "audio_format": output.get("audio_format", "float32"),
-            "error": output.get("error", "")
+            "sample_rate": output.get("sample_rate", SAMPLE_RATE),
+            "audio_format": "float32",
+            "error": output.get("error", ""),
+            "cache_hit": output.get("cache_hit", False),
+            "cache_stats": output.get("cache_stats", {})
         }
+        if "audio" not in output:
+            # Synthesis failed; keep the legacy shape so clients can read the error
+            response["audio_data"] = output.get("audio_data", [])
+            return response
+
+        response_format = output["response_format"]
+        if response_format == "json":
+            # Backward compatible: a list of floats (large and slow to parse)
+            response["audio_data"] = output["audio"].tolist()
+            return response
+
+        audio_bytes = encode_audio(output["audio"], output["audio_format"])
+        if response_format == "binary":
+            return Response(
+                content=audio_bytes,
+                media_type=MEDIA_TYPES[output["audio_format"]],
+                headers={
+                    "X-Sample-Rate": str(response["sample_rate"]),
+                    "X-Audio-Format": output["audio_format"],
+                    "X-Voice": output["voice"],
+                    "X-Speed": str(output["speed"]),
+                    "X-Cache": "HIT" if response["cache_hit"] else "MISS",
+                    "X-Cache-Hit-Rate": f"{response['cache_stats'].get('hit_rate', 0.0):.4f}",
+                },
+            )
+        response["audio_format"] = output["audio_format"]
+        response["audio_base64"] = base64.b64encode(audio_bytes).decode("utf-8")
+        return response
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Kokoro TTS LitServe / MCP server")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--voices", nargs="+", default=list(DEFAULT_VOICES),
+                        help="Voices to preload and warm up; their language pipelines are created too")
+    parser.add_argument("--cache-size", type=int, default=256,
+                        help="Phrases kept in the in-memory audio cache")
+    parser.add_argument("--cache-dir", default=None,
+                        help="Directory for the on-disk audio cache (survives restarts)")
+    return parser.parse_args()
 
 # Package and publish the MCP tool
 if __name__ == "__main__":
+    args = parse_args()
     mcp = MCP(name="TextToSpeech", description="Convert text to speech using Kokoro TTS")
-    api = Tts(mcp=mcp)
-    server = ls.LitServer(api)
-    server.run(port=8001) 
\ No newline at end of file
+    # One worker owns the Kokoro model and phrase cache; TtsSpec serves whole clips from /predict
+    # and segments from /stream through it
+    api = Tts(voices=args.voices, cache_size=args.cache_size, cache_dir=args.cache_dir, mcp=mcp)
+    # Prometheus metrics for both endpoints are served at /metrics
+    prune_metrics_dir()
+    server = ls.LitServer(api, middlewares=[(MetricsMiddleware, {"server": "tts"})])
+    add_metrics_route(server)
+    server.run(port=args.port) 
\ No newline at end of file